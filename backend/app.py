@@ -1,11 +1,18 @@
-from fastapi import FastAPI, Query, Request, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Query, Request, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from services.hr_service import HRService
+from modules.job_store import JobStore, JobCancelled
+from modules.export_stream import EXPORT_FORMATS, ExportFormatError
+from modules.metrics import HTTP_REQUEST_SECONDS, JOBS_FINISHED, render_latest
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 import uvicorn
 import os
+import json
 import time
+import asyncio
 import threading
 from utils.logger import get_logger
 
@@ -16,9 +23,6 @@ logger.info("Initializing FastAPI application")
 app = FastAPI()
 logger.info("FastAPI application created successfully")
 
-# Global progress tracking
-progress_store = {}
-
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
@@ -29,6 +33,11 @@ async def log_requests(request: Request, call_next):
     process_time = time.time() - start_time
     logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
     
+    # Label by route template (/api/process/progress/{job_id}) so job ids don't explode cardinality
+    route = request.scope.get('route')
+    route_path = getattr(route, 'path', 'unmatched')
+    HTTP_REQUEST_SECONDS.labels(request.method, route_path, str(response.status_code)).observe(process_time)
+    
     return response
 
 logger.info("Adding CORS middleware")
@@ -45,18 +54,85 @@ logger.info("Initializing HR service")
 hr_service = HRService()
 logger.info("HR service initialized successfully")
 
+# Month jobs live in SQLite so every gunicorn worker sees the same queue and progress,
+# and run on a dedicated executor rather than the request threadpool
+jobs_config = hr_service.config.get('jobs', {})
+job_store = JobStore(
+    jobs_config.get('db_path', 'output/jobs/jobs.sqlite'),
+    lease_seconds=jobs_config.get('lease_seconds', 60)
+)
+job_executor = ThreadPoolExecutor(max_workers=jobs_config.get('max_concurrent', 1), thread_name_prefix="month-job")
+heartbeat_stop = threading.Event()
+
+def renew_job_leases():
+    # Every worker also expires jobs abandoned by workers that crashed or were killed
+    while not heartbeat_stop.wait(jobs_config.get('heartbeat_seconds', 10)):
+        try:
+            job_store.heartbeat()
+            job_store.expire_stale_jobs()
+        except Exception as e:
+            logger.error(f"Error renewing job leases: {str(e)}", exc_info=True)
+
+@app.on_event("startup")
+def recover_jobs():
+    job_store.expire_stale_jobs()
+    threading.Thread(target=renew_job_leases, name="job-heartbeat", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_job_executor():
+    heartbeat_stop.set()
+    job_executor.shutdown(wait=False, cancel_futures=True)
+    # Queued jobs only exist in this worker's executor; don't leave them blocking their month
+    job_store.release_queued_jobs()
+
+@app.on_event("shutdown")
+async def close_sheets_api():
+    await hr_service.sheets_api.aclose()
+
+@app.on_event("startup")
+def warm_up_models():
+    if not hr_service.config['ocr'].get('warm_up', True):
+        logger.info("Model warm-up disabled in config")
+        return
+
+    def load_models():
+        try:
+            stats = hr_service.warm_up_models()
+            logger.info(f"Models warmed up: {stats}")
+        except Exception as e:
+            logger.error(f"Error warming up models: {str(e)}", exc_info=True)
+
+    # Load in the background so the worker can serve dashboard requests meanwhile
+    threading.Thread(target=load_models, name="model-warmup", daemon=True).start()
+
 @app.get("/")
 def read_root():
     return {"message": "OCR Backend API", "status": "running", "frontend": "http://localhost:3000"}
 
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 class MonthProcess(BaseModel):
     month_year: str
 
+@app.get("/api/dashboard")
+async def get_dashboard(year: str = None, month: str = None):
+    logger.info(f"Getting dashboard for year={year}, month={month}")
+    try:
+        result = await hr_service.get_dashboard(year, month)
+        logger.info("Dashboard retrieved successfully")
+        return result
+    except Exception as e:
+        logger.error(f"Error getting dashboard: {str(e)}", exc_info=True)
+        raise
+
 @app.get("/api/dashboard/metrics")
-def get_metrics(year: str = None, month: str = None):
+async def get_metrics(year: str = None, month: str = None):
     logger.info(f"Getting dashboard metrics for year={year}, month={month}")
     try:
-        result = hr_service.get_dashboard_metrics(year, month)
+        result = await hr_service.get_dashboard_metrics(year, month)
         logger.info(f"Dashboard metrics retrieved successfully")
         return result
     except Exception as e:
@@ -64,10 +140,10 @@ def get_metrics(year: str = None, month: str = None):
         raise
 
 @app.get("/api/dashboard/summary")
-def get_summary(year: str = None, month: str = None):
+async def get_summary(year: str = None, month: str = None):
     logger.info(f"Getting dashboard summary for year={year}, month={month}")
     try:
-        result = hr_service.get_monthly_summary(year, month)
+        result = await hr_service.get_monthly_summary(year, month)
         logger.info("Dashboard summary retrieved successfully")
         return result
     except Exception as e:
@@ -75,10 +151,10 @@ def get_summary(year: str = None, month: str = None):
         raise
 
 @app.get("/api/dashboard/employees")
-def get_employees(year: str = None, month: str = None):
+async def get_employees(year: str = None, month: str = None):
     logger.info(f"Getting employee reimbursements for year={year}, month={month}")
     try:
-        result = hr_service.get_employee_reimbursements(year, month)
+        result = await hr_service.get_employee_reimbursements(year, month)
         logger.info("Employee reimbursements retrieved successfully")
         return result
     except Exception as e:
@@ -86,49 +162,81 @@ def get_employees(year: str = None, month: str = None):
         raise
 
 @app.get("/api/records")
-def get_all_records(year: str = None, month: str = None):
-    logger.info(f"Getting all records for year={year}, month={month}")
+def get_records(year: str = None, month: str = None, offset: int = Query(None, ge=0),
+                limit: int = Query(None, ge=1, le=5000), fields: str = None, sort: str = None,
+                emp_id: str = None, category: str = None, eligible: str = None):
+    logger.info(f"Getting records for year={year}, month={month}, offset={offset}, limit={limit}")
+    # Without offset/limit the response stays the plain list of every matching row existing
+    # clients expect; either one switches to a page wrapped in an envelope
+    paginated = offset is not None or limit is not None
+    if paginated:
+        offset = offset or 0
+        limit = limit or 100
     try:
-        result = hr_service.get_all_records(year, month)
-        logger.info("All records retrieved successfully")
-        return result
+        total, records_json = hr_service.get_records_page(
+            year, month, offset or 0, limit, fields, sort, emp_id, category, eligible
+        )
+    except ValueError as e:
+        logger.warning(f"Rejected records request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error getting all records: {str(e)}", exc_info=True)
+        logger.error(f"Error getting records: {str(e)}", exc_info=True)
         raise
+    
+    logger.info(f"Records retrieved successfully ({total} matching rows)")
+    if not paginated:
+        return Response(content=records_json, media_type='application/json')
+    
+    next_offset = offset + limit if offset + limit < total else None
+    # The page is already JSON, so wrap it rather than parse and re-encode it
+    body = (
+        f'{{"total":{total},"offset":{offset},"limit":{limit},'
+        f'"next_offset":{json.dumps(next_offset)},"records":{records_json}}}'
+    )
+    return Response(content=body, media_type='application/json')
 
 @app.get("/api/download/images")
 def download_images(type: str = Query(None), value: str = Query(None), year: str = None, month: str = None):
     logger.info(f"Downloading images for type={type}, value={value}, year={year}, month={month}")
     try:
-        zip_path = hr_service.download_images(type, value, year, month)
-        logger.info(f"Images zip created at: {zip_path}")
-        return FileResponse(zip_path, media_type='application/zip', filename=f'images_{type}_{value}.zip')
+        zip_stream = hr_service.download_images(type, value, year, month)
+        if zip_stream is None:
+            raise HTTPException(status_code=404, detail="No images found")
+        logger.info("Streaming images zip")
+        return StreamingResponse(
+            zip_stream,
+            media_type='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="images_{type}_{value}.zip"'}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error downloading images: {str(e)}", exc_info=True)
         raise
 
+@app.get("/api/models")
+def get_model_stats():
+    return {
+        'models': hr_service.get_model_stats(),
+        'embedding_cache': hr_service.get_embedding_cache_stats()
+    }
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return {
+        'archive': hr_service.get_archive_cache_stats(),
+        'sheets_api': hr_service.get_sheets_api_stats()
+    }
+
 @app.get("/api/debug/data")
 def debug_data():
     logger.info("Debug data request received")
     try:
-        import os
-        logger.info(f"Changing directory to: {hr_service.ocr_project_dir}")
-        os.chdir(hr_service.ocr_project_dir)
+        result = hr_service.get_debug_data()
         
-        logger.info(f"Reading sheet data from: {hr_service.spreadsheet_title}")
-        df = hr_service.processor.read_sheet_data(hr_service.spreadsheet_title, hr_service.archive_sheet)
-        
-        logger.info(f"Changing directory back to: {hr_service.original_dir}")
-        os.chdir(hr_service.original_dir)
-        
-        if df is not None and not df.empty:
-            logger.info(f"Debug data retrieved successfully - {len(df)} rows")
-            return {
-                "total_rows": len(df),
-                "columns": df.columns.tolist(),
-                "sample_month_year": df['Month Year'].unique().tolist() if 'Month Year' in df.columns else [],
-                "first_5_rows": df.head().to_dict('records')
-            }
+        if result:
+            logger.info(f"Debug data retrieved successfully - {result['total_rows']} rows")
+            return result
         logger.warning("No data found in debug request")
         return {"message": "No data found"}
     except Exception as e:
@@ -136,62 +244,118 @@ def debug_data():
         raise
 
 @app.post("/api/export/csv")
-def export_csv(year: str = None, month: str = None):
-    logger.info(f"Exporting CSV report for year={year}, month={month}")
+def export_csv(year: str = None, month: str = None, format: str = 'csv'):
+    logger.info(f"Exporting {format} report for year={year}, month={month}")
     try:
-        csv_path = hr_service.export_csv_report(year, month)
-        logger.info(f"CSV export completed, path: {csv_path}")
-        
-        if csv_path and os.path.exists(csv_path):
-            filename = f"{year}_{month}_reimbursement_report.csv" if year and month else "reimbursement_report.csv"
-            logger.info(f"Returning CSV file: {filename}")
-            return FileResponse(csv_path, media_type='text/csv', filename=filename)
-        
-        logger.warning("No CSV data found for the specified period")
-        return {"message": "No data found for the specified period"}
+        export_stream = hr_service.export_report(year, month, format)
+    except ExportFormatError as e:
+        logger.warning(f"Rejected export request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error exporting CSV: {str(e)}", exc_info=True)
         raise
+    
+    if export_stream is None:
+        logger.warning("No CSV data found for the specified period")
+        return {"message": "No data found for the specified period"}
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{year}_{month}_reimbursement_report{extension}" if year and month else f"reimbursement_report{extension}"
+    logger.info(f"Streaming export: {filename}")
+    return StreamingResponse(
+        export_stream,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 @app.post("/api/process/month")
-def process_month(request: MonthProcess, background_tasks: BackgroundTasks):
+def process_month(request: MonthProcess):
     logger.info(f"Processing month data request: {request.month_year}")
     
-    job_id = f"{request.month_year}_{int(time.time())}"
-    progress_store[job_id] = {
-        'progress': 0,
-        'status': 'Starting...',
-        'completed': False,
-        'error': None
-    }
+    job_id, created = job_store.create(request.month_year)
+    if not created:
+        logger.info(f"Month {request.month_year} already has an active job: {job_id}")
+        return {'job_id': job_id, 'message': 'Processing already in progress'}
     
-    background_tasks.add_task(process_month_background, request.month_year, job_id)
+    job_executor.submit(process_month_background, request.month_year, job_id)
     
     return {'job_id': job_id, 'message': 'Processing started'}
 
 @app.get("/api/process/progress/{job_id}")
 def get_progress(job_id: str):
-    if job_id not in progress_store:
+    job = job_store.get(job_id)
+    if job is None:
+        return {'error': 'Job not found'}
+    return job
+
+@app.get("/api/process/events/{job_id}")
+async def stream_progress(job_id: str, request: Request):
+    poll_seconds = jobs_config.get('event_poll_seconds', 0.25)
+    heartbeat_seconds = jobs_config.get('event_heartbeat_seconds', 15)
+    
+    async def events():
+        # The job may be running in another worker, so the shared store is the source of truth;
+        # an event is only sent when the job's row has changed since the last one
+        last_updated = None
+        last_sent = time.monotonic()
+        while True:
+            if await request.is_disconnected():
+                return
+            
+            job = await run_in_threadpool(job_store.get, job_id)
+            if job is None:
+                yield f"event: missing\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                return
+            
+            if job['updated_at'] != last_updated:
+                last_updated = job['updated_at']
+                last_sent = time.monotonic()
+                event = 'done' if job['completed'] else 'progress'
+                yield f"event: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+                if job['completed']:
+                    return
+            elif time.monotonic() - last_sent >= heartbeat_seconds:
+                # Comment line keeps proxies from closing an idle stream
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            
+            await asyncio.sleep(poll_seconds)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.get("/api/process/jobs")
+def list_jobs(limit: int = 20):
+    return {'jobs': job_store.list_jobs(limit)}
+
+@app.post("/api/process/cancel/{job_id}")
+def cancel_job(job_id: str):
+    logger.info(f"Cancel requested for job {job_id}")
+    job = job_store.request_cancel(job_id)
+    if job is None:
         return {'error': 'Job not found'}
-    return progress_store[job_id]
+    return job
 
 def process_month_background(month_year: str, job_id: str):
+    if not job_store.claim(job_id):
+        logger.info(f"Job {job_id} was cancelled before it started")
+        return
+    
     try:
-        result = hr_service.process_month_data_with_progress(month_year, job_id, progress_store)
-        progress_store[job_id].update({
-            'progress': 100,
-            'status': 'Completed',
-            'completed': True,
-            'result': result
-        })
+        result = hr_service.process_month_data_with_progress(month_year, job_id, job_store)
+        job_store.finish(job_id, 'completed', 'Completed', progress=100, result=result)
+        JOBS_FINISHED.labels('completed').inc()
+    except JobCancelled:
+        logger.info(f"Job {job_id} cancelled")
+        job_store.finish(job_id, 'cancelled', 'Cancelled', error='Cancelled')
+        JOBS_FINISHED.labels('cancelled').inc()
     except Exception as e:
         logger.error(f"Error processing month {month_year}: {str(e)}", exc_info=True)
-        progress_store[job_id].update({
-            'progress': 0,
-            'status': f'Error: {str(e)}',
-            'completed': True,
-            'error': str(e)
-        })
+        job_store.finish(job_id, 'failed', f'Error: {str(e)}', progress=0, error=str(e))
+        JOBS_FINISHED.labels('failed').inc()
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1 @@
+# OCR Project Benchmarks and Regression Harnesses
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Micro-benchmark: substring month filter vs indexed ArchiveSnapshot lookup.
+
+Usage (from the backend directory):
+    python -m benchmarks.archive_filter [--rows 100000] [--repeat 50]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.archive_cache import ArchiveSnapshot
+
+
+def make_archive(rows, seed=0):
+    """Synthetic Archive frame spanning several years of months"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, rows), unit='D')
+    return pd.DataFrame({
+        'Date': dates,
+        'UserID': rng.integers(1000, 1500, rows).astype(str),
+        'Eligible for Reimbursement': rng.choice(['Yes', 'No'], rows),
+        'Reimbursement Amount': rng.choice([0, 40], rows),
+        'Category': rng.choice(['1', '2', '3', '4'], rows),
+        'Month Year': dates.strftime('%Y-%b')
+    })
+
+
+def substring_filter(df, year, month):
+    """The pre-index filter from HRService._get_filtered_data"""
+    return df[df['Month Year'].astype(str).str.contains(f"{year}-{month}", case=False, na=False)]
+
+
+def time_call(function, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start_time) / repeat, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--rows', type=int, default=100000)
+    arg_parser.add_argument('--repeat', type=int, default=50)
+    args = arg_parser.parse_args()
+    
+    df = make_archive(args.rows)
+    
+    build_start = time.perf_counter()
+    snapshot = ArchiveSnapshot(df)
+    build_seconds = time.perf_counter() - build_start
+    
+    substring_seconds, expected = time_call(lambda: substring_filter(df, '2024', 'Oct'), args.repeat)
+    indexed_seconds, actual = time_call(lambda: snapshot.select('2024', 'Oct'), args.repeat)
+    
+    report = {
+        'rows': args.rows,
+        'matched_rows': len(actual),
+        'results_match': expected.index.equals(actual.index),
+        'index_build_ms': round(build_seconds * 1000, 3),
+        'substring_filter_ms': round(substring_seconds * 1000, 3),
+        'indexed_lookup_ms': round(indexed_seconds * 1000, 3),
+        'speedup': round(substring_seconds / indexed_seconds, 1) if indexed_seconds else None
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Concurrent dashboard reads against the local Sheets stand-in.
+
+Fires --concurrency simultaneous HRService.get_dashboard calls with a cold Archive
+mirror, so every call needs the sheet, and reports latency and how many upstream
+Sheets/Drive requests they cost after coalescing.
+
+Usage (from the backend directory):
+    python -m benchmarks.dashboard_concurrency [--concurrency 50] [--rows 5000] [--latency 0.2]
+"""
+import os
+import sys
+import json
+import time
+import copy
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.utils import load_config
+from modules.post_processing import PostProcessor
+from services.hr_service import HRService
+from benchmarks.fakes import FakeSheetsClient
+from benchmarks.sheets_server import SheetsStandIn, make_archive_rows
+
+
+def stand_in_config(base_config, workdir, base_url):
+    config = copy.deepcopy(base_config)
+    cache_config = config.setdefault('cache', {})
+    cache_config['archive_version_path'] = os.path.join(workdir, 'archive.version')
+    cache_config['month_aggregates_path'] = os.path.join(workdir, 'month_aggregates.json')
+    cache_config['archive_mirror_path'] = os.path.join(workdir, 'archive.sqlite')
+
+    api_config = config['gsheets'].setdefault('api', {})
+    api_config['sheets_base_url'] = base_url
+    api_config['drive_base_url'] = base_url
+    api_config['authenticate'] = False
+    return config
+
+
+async def timed_dashboard(hr_service, year, month):
+    start_time = time.perf_counter()
+    await hr_service.get_dashboard(year, month)
+    return time.perf_counter() - start_time
+
+
+async def run_round(hr_service, concurrency, year, month):
+    start_time = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(
+        timed_dashboard(hr_service, year, month) for _ in range(concurrency)
+    )))
+    return {
+        'seconds': round(time.perf_counter() - start_time, 3),
+        'p50_seconds': round(latencies[len(latencies) // 2], 3),
+        'max_seconds': round(latencies[-1], 3)
+    }
+
+
+async def run(args, config, server):
+    hr_service = HRService(config, processor=PostProcessor(config, gc=FakeSheetsClient()))
+    try:
+        report = {'cold': await run_round(hr_service, args.concurrency, '2025', 'Oct')}
+        report['cold']['upstream_requests'] = dict(server.request_counts)
+        report['warm'] = await run_round(hr_service, args.concurrency, '2025', 'Oct')
+        report['upstream_requests'] = dict(server.request_counts)
+        report['sheets_api'] = hr_service.get_sheets_api_stats()
+        report['archive_cache'] = hr_service.get_archive_cache_stats()
+    finally:
+        await hr_service.sheets_api.aclose()
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--config', default='config/config.yaml')
+    arg_parser.add_argument('--concurrency', type=int, default=50)
+    arg_parser.add_argument('--rows', type=int, default=5000)
+    arg_parser.add_argument('--latency', type=float, default=0.2, help="Seconds the stand-in adds per response")
+    args = arg_parser.parse_args()
+
+    base_config = load_config(args.config)
+    sheets = FakeSheetsClient()
+    sheets.set_rows(base_config['gsheets']['spreadsheet_title'], base_config['gsheets']['archive_sheet'],
+                    make_archive_rows(args.rows))
+    server = SheetsStandIn(sheets, latency_seconds=args.latency).start()
+
+    workdir = tempfile.mkdtemp(prefix='dashboard_bench_')
+    try:
+        report = asyncio.run(run(args, stand_in_config(base_config, workdir, server.base_url), server))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report.update({'concurrency': args.concurrency, 'rows': args.rows, 'latency_seconds': args.latency})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
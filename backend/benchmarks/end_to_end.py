@@ -0,0 +1,267 @@
+"""End-to-end OCR benchmark on synthetic receipts with offline Drive and Sheets stand-ins.
+
+Renders receipts with known fields, times OCREngine.process_image per image and a
+full process_month_data_with_progress run, and writes timings (per job stage too),
+throughput, peak RSS and extraction accuracy to a JSON report for comparing releases.
+
+Usage (from the backend directory):
+    python -m benchmarks.end_to_end [--count 24] [--employees 4] [--output benchmarks/results/end_to_end.json]
+"""
+import os
+import sys
+import json
+import time
+import copy
+import random
+import shutil
+import platform
+import tempfile
+import argparse
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from modules.utils import load_config, get_rss_mb
+from modules.ocr_engine import OCREngine
+from modules.post_processing import PostProcessor
+from modules.model_registry import model_registry
+from modules.job_store import JobStore
+from services.hr_service import HRService
+from benchmarks.synthetic_receipts import generate_receipts, make_employee_code
+from benchmarks.fakes import FakeDrive, FakeSheetsClient
+
+FIELDS = ['Date', 'Code', 'Amount', 'Company', 'Meal']
+
+
+def get_peak_rss_mb():
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def field_matches(field, expected, actual):
+    if field == 'Amount':
+        try:
+            return actual is not None and abs(float(actual) - float(expected)) < 0.01
+        except (TypeError, ValueError):
+            return False
+    return str(actual or '').strip() == str(expected)
+
+
+class AccuracyTally:
+    """Per-field hit counts of extracted receipts against their ground truth"""
+
+    def __init__(self):
+        self.total = 0
+        self.hits = {field: 0 for field in FIELDS}
+        self.all_correct = 0
+        self.missing = 0
+
+    def add(self, truth, result):
+        self.total += 1
+        if not result:
+            self.missing += 1
+            return
+        matches = {field: field_matches(field, truth[field], result.get(field)) for field in FIELDS}
+        for field, matched in matches.items():
+            self.hits[field] += int(matched)
+        self.all_correct += int(all(matches.values()))
+
+    def report(self):
+        return {
+            'receipts': self.total,
+            'missing_results': self.missing,
+            'field_accuracy': {
+                field: round(hits / self.total, 3) if self.total else None
+                for field, hits in self.hits.items()
+            },
+            'all_fields_accuracy': round(self.all_correct / self.total, 3) if self.total else None
+        }
+
+
+def benchmark_config(base_config, workdir, use_cache):
+    """Point every path the job writes to into workdir"""
+    config = copy.deepcopy(base_config)
+    config['paths']['download_base'] = os.path.join(workdir, 'images')
+    config['paths']['output_csv'] = os.path.join(workdir, 'csv')
+    config['gdrive']['incremental_sync'] = False
+    config['gdrive']['manifest_path'] = os.path.join(workdir, 'images', '.drive_manifest.json')
+
+    cache_config = config.setdefault('cache', {})
+    cache_config['ocr_results_enabled'] = use_cache
+    cache_config['ocr_results_path'] = os.path.join(workdir, 'cache', 'ocr_results.sqlite')
+    cache_config['archive_version_path'] = os.path.join(workdir, 'cache', 'archive.version')
+    cache_config['month_aggregates_path'] = os.path.join(workdir, 'cache', 'month_aggregates.json')
+    cache_config['archive_mirror_path'] = os.path.join(workdir, 'cache', 'archive.sqlite')
+    config.setdefault('jobs', {})['db_path'] = os.path.join(workdir, 'jobs', 'jobs.sqlite')
+
+    os.makedirs(config['paths']['output_csv'], exist_ok=True)
+    return config
+
+
+def build_fixtures(config, workdir, count, employee_count, month_year, formats, widths, seed, drive_page_size=5):
+    """Render receipts and lay them out as a Drive tree, with matching Sheets data"""
+    rng = random.Random(seed)
+    codes = []
+    while len(codes) < employee_count:
+        code = make_employee_code(rng)
+        if code not in codes:
+            codes.append(code)
+    employees = [(f"user{index:02d}", code) for index, code in enumerate(codes)]
+
+    receipts = generate_receipts(
+        os.path.join(workdir, 'source'), count, month_year, formats, widths, seed,
+        emp_codes=[code for _, code in employees]
+    )
+
+    # Small pages so listings that stop after the first page lose receipts visibly
+    drive = FakeDrive(page_size=drive_page_size)
+    root_id = drive.add_folder(config['gdrive']['root_folder_name'])
+    month_folders = {}
+    for user_id, _ in employees:
+        employee_id = drive.add_folder(user_id, root_id)
+        month_folders[user_id] = drive.add_folder(month_year, employee_id)
+
+    # Each receipt goes into the folder of the employee whose code is printed on it
+    user_by_code = {code: user_id for user_id, code in employees}
+    truth_by_name = {}
+    for receipt in receipts:
+        user_id = user_by_code[receipt['truth']['Code']]
+        file_name = os.path.basename(receipt['path'])
+        drive.add_file(file_name, receipt['path'], month_folders[user_id])
+        truth_by_name[file_name] = receipt['truth']
+
+    sheets = FakeSheetsClient()
+    sheets.set_rows('Quark City Emp Id', 'Grazitti Data', [['Emp ID', 'First Name', 'Last Name']] + [
+        [code, user_id.capitalize(), 'Bench'] for user_id, code in employees
+    ])
+    sheets.set_rows(config['gsheets']['spreadsheet_title'], 'Employee Data', [['UserID', 'Emp ID']] + [
+        [user_id, code] for user_id, code in employees
+    ])
+    return receipts, truth_by_name, drive, sheets
+
+
+def run_process_image(config, receipts):
+    """Time OCREngine.process_image per receipt, grouped by format and width"""
+    load_start = time.perf_counter()
+    ocr_engine = OCREngine(config)
+    model_load_seconds = time.perf_counter() - load_start
+
+    tally = AccuracyTally()
+    variants = {}
+    total_seconds = 0.0
+    for receipt in receipts:
+        start_time = time.perf_counter()
+        result = ocr_engine.process_image(receipt['path'])
+        seconds = time.perf_counter() - start_time
+        total_seconds += seconds
+        tally.add(receipt['truth'], result)
+
+        variant = variants.setdefault(f"{receipt['format']}@{receipt['width']}", {'images': 0, 'seconds': 0.0})
+        variant['images'] += 1
+        variant['seconds'] += seconds
+
+    for variant in variants.values():
+        variant['avg_seconds'] = round(variant['seconds'] / variant['images'], 3)
+        variant['seconds'] = round(variant['seconds'], 3)
+
+    return {
+        'model_load_seconds': round(model_load_seconds, 2),
+        'seconds': round(total_seconds, 2),
+        'images_per_second': round(len(receipts) / total_seconds, 2) if total_seconds else None,
+        'by_variant': variants,
+        'image_decode': ocr_engine.get_decode_stats(),
+        'accuracy': tally.report()
+    }
+
+
+def run_month_job(config, month_year, truth_by_name, drive, sheets):
+    """Run the full month job against the stand-ins and score the OCR CSV it produced"""
+    hr_service = HRService(config, processor=PostProcessor(config, gc=sheets), drive=drive)
+    job_store = JobStore(config['jobs']['db_path'])
+    job_id, _ = job_store.create(month_year)
+    job_store.claim(job_id)
+
+    start_time = time.perf_counter()
+    result = hr_service.process_month_data_with_progress(month_year, job_id, job_store)
+    seconds = time.perf_counter() - start_time
+
+    report = {
+        'seconds': round(seconds, 2),
+        # initialize, download_ocr, post_process, employee_matching, archive_push
+        'stage_seconds': (result or {}).get('stage_seconds', {}),
+        'images_per_second': round(len(truth_by_name) / seconds, 2) if seconds else None,
+        'sheets_calls': sheets.get_calls(),
+        'drive_list_calls': drive.list_calls,
+        'result': result
+    }
+
+    csv_path = os.path.join(config['paths']['output_csv'], f"{month_year}.csv")
+    tally = AccuracyTally()
+    rows = {}
+    if os.path.exists(csv_path):
+        for row in pd.read_csv(csv_path, dtype=str, keep_default_na=False).to_dict('records'):
+            rows[os.path.basename(row['Image_name'])] = row
+    for file_name, truth in truth_by_name.items():
+        tally.add(truth, rows.get(file_name))
+    report['accuracy'] = tally.report()
+
+    archive = sheets.open(config['gsheets']['spreadsheet_title']).worksheet(config['gsheets']['archive_sheet'])
+    report['archive_rows'] = max(len(archive.rows) - 1, 0)
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--config', default='config/config.yaml')
+    arg_parser.add_argument('--count', type=int, default=24, help="Synthetic receipts to render")
+    arg_parser.add_argument('--employees', type=int, default=4)
+    arg_parser.add_argument('--month-year', default='October 2025')
+    arg_parser.add_argument('--formats', default='png,jpg,heic')
+    arg_parser.add_argument('--widths', default='600,1200,2400')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--drive-page-size', type=int, default=5, help="Items per fake Drive listing page")
+    arg_parser.add_argument('--use-cache', action='store_true', help="Keep the OCR result cache enabled")
+    arg_parser.add_argument('--skip-job', action='store_true', help="Only time process_image")
+    arg_parser.add_argument('--workdir', help="Keep fixtures and outputs here instead of a temp directory")
+    arg_parser.add_argument('--output', default='benchmarks/results/end_to_end.json')
+    args = arg_parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ocr_bench_')
+    config = benchmark_config(load_config(args.config), workdir, args.use_cache)
+
+    try:
+        receipts, truth_by_name, drive, sheets = build_fixtures(
+            config, workdir, args.count, args.employees, args.month_year,
+            args.formats.split(','), [int(width) for width in args.widths.split(',')], args.seed,
+            args.drive_page_size
+        )
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'receipts': len(receipts),
+            'employees': args.employees,
+            'ocr': {key: config['ocr'].get(key) for key in ('det_arch', 'reco_arch', 'single_pass', 'batch_size', 'max_image_side')},
+            'pipeline_config': config.get('pipeline', {}),
+            'process_image': run_process_image(config, receipts),
+            'rss_after_process_image_mb': round(get_rss_mb(), 1)
+        }
+        if not args.skip_job:
+            report['month_job'] = run_month_job(config, args.month_year, truth_by_name, drive, sheets)
+        report['model_stats'] = model_registry.get_stats()
+        report['peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2, default=str))
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as report_file:
+        json.dump(report, report_file, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
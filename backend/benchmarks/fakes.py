@@ -0,0 +1,181 @@
+"""In-memory Google Drive and Google Sheets stand-ins for offline benchmarks.
+
+FakeDrive implements the slice of PyDrive that GDriveDownloader uses and
+FakeSheetsClient the slice of gspread that PostProcessor uses.
+"""
+import re
+import time
+import shutil
+import hashlib
+import itertools
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class FakeDriveFile(dict):
+    """Drive file metadata whose content comes from a local file"""
+
+    def __init__(self, metadata, source_path=None, latency_seconds=0.0):
+        super().__init__(metadata)
+        self.source_path = source_path
+        self.latency_seconds = latency_seconds
+
+    def GetContentFile(self, path):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        shutil.copyfile(self.source_path, path)
+
+
+class _FakeListing:
+    """Paged like PyDrive's GoogleDriveFileList: GetList() walks every page unless maxResults is set"""
+
+    def __init__(self, items, params, page_size):
+        self.items = items
+        self.max_results = params.get('maxResults')
+        # Drive may return short pages, so maxResults only caps the page size
+        self.page_size = min(self.max_results, page_size) if self.max_results else page_size
+
+    def GetList(self):
+        pages = [self.items[start:start + self.page_size] for start in range(0, len(self.items), self.page_size)]
+        if self.max_results is not None:
+            pages = pages[:1]
+        return [item for page in pages for item in page]
+
+
+class FakeDrive:
+    """Folder tree answering the title / 'in parents' / mimeType queries GDriveDownloader issues"""
+
+    def __init__(self, list_latency_seconds=0.0, download_latency_seconds=0.0, page_size=100):
+        self.items = []
+        self.list_calls = 0
+        # Drive v2 returns 100 items per page by default; small pages exercise paging
+        self.page_size = page_size
+        self.list_latency_seconds = list_latency_seconds
+        self.download_latency_seconds = download_latency_seconds
+        self._ids = itertools.count(1)
+
+    def add_folder(self, title, parent_id=None):
+        folder_id = f"folder{next(self._ids)}"
+        self.items.append(FakeDriveFile({
+            'id': folder_id,
+            'title': title,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [{'id': parent_id}] if parent_id else []
+        }))
+        return folder_id
+
+    def add_file(self, title, source_path, parent_id):
+        with open(source_path, 'rb') as source:
+            md5 = hashlib.md5(source.read()).hexdigest()
+        file_id = f"file{next(self._ids)}"
+        self.items.append(FakeDriveFile({
+            'id': file_id,
+            'title': title,
+            'mimeType': 'application/octet-stream',
+            'parents': [{'id': parent_id}],
+            'md5Checksum': md5,
+            'modifiedDate': '2025-01-01T00:00:00.000Z'
+        }, source_path, self.download_latency_seconds))
+        return file_id
+
+    def ListFile(self, params):
+        self.list_calls += 1
+        if self.list_latency_seconds:
+            time.sleep(self.list_latency_seconds)
+
+        query = params['q']
+        title = re.search(r"title='([^']*)'", query)
+        parent_ids = set(re.findall(r"'([^']+)' in parents", query))
+        folders_only = f"mimeType='{FOLDER_MIME_TYPE}'" in query
+
+        matches = []
+        for item in self.items:
+            if title and item['title'] != title.group(1):
+                continue
+            if parent_ids and not parent_ids.intersection(parent['id'] for parent in item['parents']):
+                continue
+            if folders_only and item['mimeType'] != FOLDER_MIME_TYPE:
+                continue
+            matches.append(item)
+        return _FakeListing(matches, params, self.page_size)
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter.upper()) - ord('A') + 1
+    return index - 1
+
+
+class FakeWorksheet:
+    """Rows of strings supporting the read/append/update calls PostProcessor makes"""
+
+    def __init__(self, rows=None):
+        self.rows = [[str(value) for value in row] for row in rows or []]
+        self.calls = 0
+
+    def get_all_values(self):
+        self.calls += 1
+        return [list(row) for row in self.rows]
+
+    def row_values(self, row_number):
+        self.calls += 1
+        return list(self.rows[row_number - 1]) if len(self.rows) >= row_number else []
+
+    def batch_get(self, ranges, value_render_option=None, date_time_render_option=None):
+        """Only whole-column ranges such as 'C2:C' are supported; cells are always returned as stored"""
+        self.calls += 1
+        value_ranges = []
+        for cell_range in ranges:
+            match = re.match(r'([A-Z]+)(\d+):([A-Z]+)$', cell_range)
+            column, first_row = _column_index(match.group(1)), int(match.group(2))
+            value_ranges.append([
+                [row[column]] if column < len(row) and row[column] != '' else []
+                for row in self.rows[first_row - 1:]
+            ])
+        return value_ranges
+
+    def batch_update(self, updates, value_input_option=None):
+        self.calls += 1
+        for update in updates:
+            row_number = int(re.match(r'[A-Z]+(\d+):', update['range']).group(1))
+            self.rows[row_number - 1] = [str(value) for value in update['values'][0]]
+
+    def append_rows(self, rows, value_input_option=None):
+        self.calls += 1
+        self.rows.extend([str(value) for value in row] for row in rows)
+
+    def clear(self):
+        self.calls += 1
+        self.rows = []
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.worksheets = {}
+
+    def worksheet(self, title):
+        return self.worksheets.setdefault(title, FakeWorksheet())
+
+    def add_worksheet(self, title, rows=1, cols=1):
+        return self.worksheet(title)
+
+
+class FakeSheetsClient:
+    """gspread client stand-in; spreadsheets and worksheets are created on first use"""
+
+    def __init__(self):
+        self.spreadsheets = {}
+
+    def open(self, title):
+        return self.spreadsheets.setdefault(title, FakeSpreadsheet())
+
+    def set_rows(self, spreadsheet_title, worksheet_title, rows):
+        self.open(spreadsheet_title).worksheets[worksheet_title] = FakeWorksheet(rows)
+
+    def get_calls(self):
+        return sum(
+            worksheet.calls
+            for spreadsheet in self.spreadsheets.values()
+            for worksheet in spreadsheet.worksheets.values()
+        )
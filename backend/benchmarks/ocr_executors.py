@@ -0,0 +1,111 @@
+"""Benchmark: thread-shared OCREngine vs the OCR process pool on a fixture set.
+
+Usage (from the backend directory):
+    python -m benchmarks.ocr_executors path/to/fixtures [--threads 4] [--processes 0] [--output report.json]
+"""
+import os
+import sys
+import json
+import time
+import copy
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ocr_engine import OCREngine
+from modules.ocr_pool import OCRProcessPool, available_cores
+from modules.utils import load_config, list_files_recursive, get_rss_mb
+
+COMPARED_FIELDS = ['Date', 'Code', 'Amount', 'Company', 'Meal']
+
+
+def batches(image_paths, batch_size):
+    return [image_paths[start:start + batch_size] for start in range(0, len(image_paths), batch_size)]
+
+
+def run_threads(config, image_paths, threads):
+    """The pre-pool setup: several threads sharing one engine and one set of models"""
+    ocr_engine = OCREngine(config)
+    batch_size = config['ocr'].get('batch_size', 8)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = []
+        for batch_results in executor.map(ocr_engine.process_images_batch, batches(image_paths, batch_size)):
+            results.extend(batch_results)
+    return results, time.perf_counter() - start_time
+
+
+def run_processes(config, image_paths, processes, torch_threads):
+    with OCRProcessPool(config, processes=processes, torch_threads=torch_threads) as pool:
+        # Model loading happens in each worker's initializer; keep it out of the timing
+        start_time = time.perf_counter()
+        pool.warm_up(image_paths[0])
+        startup_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        results = pool.process_paths(image_paths)
+        return results, time.perf_counter() - start_time, startup_seconds, pool.processes
+
+
+def compare(fixtures_dir, config, threads, processes, torch_threads):
+    # Cached results would hide the OCR cost being measured
+    config = copy.deepcopy(config)
+    config.setdefault('cache', {})['ocr_results_enabled'] = False
+
+    image_paths = sorted(list_files_recursive(fixtures_dir, config['ocr']['supported_formats']))
+    report = {'images': len(image_paths), 'cores': available_cores(), 'threads': threads, 'mismatches': []}
+    if not image_paths:
+        return report
+
+    thread_results, thread_seconds = run_threads(config, image_paths, threads)
+    report['thread_seconds'] = round(thread_seconds, 2)
+    report['thread_images_per_second'] = round(len(image_paths) / thread_seconds, 2)
+    report['thread_rss_mb'] = get_rss_mb()
+
+    process_results, process_seconds, startup_seconds, process_count = run_processes(
+        config, image_paths, processes, torch_threads
+    )
+    report['processes'] = process_count
+    report['torch_threads'] = torch_threads
+    report['process_startup_seconds'] = round(startup_seconds, 2)
+    report['process_seconds'] = round(process_seconds, 2)
+    report['process_images_per_second'] = round(len(image_paths) / process_seconds, 2)
+    report['speedup'] = round(thread_seconds / process_seconds, 2)
+
+    # Both executors run the same extraction code, so their fields should agree
+    for image_path, expected, actual in zip(image_paths, thread_results, process_results):
+        for field in COMPARED_FIELDS:
+            expected_value = expected.get(field) if expected else None
+            actual_value = actual.get(field) if actual else None
+            if expected_value != actual_value:
+                report['mismatches'].append({
+                    'image': image_path,
+                    'field': field,
+                    'threads': expected_value,
+                    'processes': actual_value
+                })
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('fixtures_dir', help="Directory of receipt images")
+    arg_parser.add_argument('--config', default='config/config.yaml')
+    arg_parser.add_argument('--threads', type=int, default=4, help="Threads sharing one engine (the current setup)")
+    arg_parser.add_argument('--processes', type=int, default=0, help="Worker processes; 0 sizes to the cores")
+    arg_parser.add_argument('--torch-threads', type=int, default=1, help="Intra-op torch threads per process")
+    arg_parser.add_argument('--output', help="Write the JSON report to this file")
+    args = arg_parser.parse_args()
+
+    report = compare(args.fixtures_dir, load_config(args.config), args.threads, args.processes or None, args.torch_threads)
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Regression harness comparing single-pass OCR against the legacy two-pass path.
+
+Usage (from the backend directory):
+    python -m benchmarks.ocr_single_pass path/to/fixtures [--output report.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ocr_engine import OCREngine
+from modules.utils import load_config, list_files_recursive
+
+COMPARED_FIELDS = ['Date', 'Code', 'Amount', 'Company', 'Meal']
+
+
+def run_mode(ocr_engine, image_path, single_pass):
+    start_time = time.perf_counter()
+    result = ocr_engine.process_image(image_path, single_pass=single_pass)
+    return result, time.perf_counter() - start_time
+
+
+def compare(fixtures_dir, config):
+    ocr_engine = OCREngine(config)
+    image_files = sorted(list_files_recursive(fixtures_dir, config['ocr']['supported_formats']))
+    
+    report = {'images': len(image_files), 'mismatches': [], 'two_pass_seconds': 0.0, 'single_pass_seconds': 0.0}
+    
+    for image_path in image_files:
+        two_pass, two_pass_time = run_mode(ocr_engine, image_path, single_pass=False)
+        single_pass, single_pass_time = run_mode(ocr_engine, image_path, single_pass=True)
+        report['two_pass_seconds'] += two_pass_time
+        report['single_pass_seconds'] += single_pass_time
+        
+        for field in COMPARED_FIELDS:
+            expected = two_pass.get(field) if two_pass else None
+            actual = single_pass.get(field) if single_pass else None
+            if expected != actual:
+                report['mismatches'].append({
+                    'image': image_path,
+                    'field': field,
+                    'two_pass': expected,
+                    'single_pass': actual
+                })
+    
+    if report['single_pass_seconds']:
+        report['speedup'] = round(report['two_pass_seconds'] / report['single_pass_seconds'], 2)
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('fixtures_dir', help="Directory of receipt images")
+    arg_parser.add_argument('--config', default='config/config.yaml')
+    arg_parser.add_argument('--output', help="Write the JSON report to this file")
+    args = arg_parser.parse_args()
+    
+    report = compare(args.fixtures_dir, load_config(args.config))
+    
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2, default=str)
+    
+    sys.exit(1 if report['mismatches'] else 0)
+
+
+if __name__ == '__main__':
+    main()
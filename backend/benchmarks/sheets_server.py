@@ -0,0 +1,143 @@
+"""Local HTTP stand-in for the Drive files.list and Sheets values.get endpoints.
+
+Serves worksheets held in a FakeSheetsClient so AsyncSheetsClient can be exercised
+offline by pointing gsheets.api.sheets_base_url and drive_base_url at it.
+
+Usage (from the backend directory):
+    python -m benchmarks.sheets_server [--port 8765] [--latency 0.2] [--rows 5000]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeSheetsClient
+
+
+class SheetsStandIn(ThreadingHTTPServer):
+    """Threaded HTTP server answering the two read calls AsyncSheetsClient makes"""
+
+    daemon_threads = True
+
+    def __init__(self, sheets, port=0, latency_seconds=0.0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.sheets = sheets
+        self.latency_seconds = latency_seconds
+        self.spreadsheet_ids = {}
+        self.request_counts = {'files_list': 0, 'values_get': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def spreadsheet_id(self, title):
+        with self._lock:
+            return self.spreadsheet_ids.setdefault(title, f"sheet{len(self.spreadsheet_ids) + 1}")
+
+    def count(self, operation):
+        with self._lock:
+            self.request_counts[operation] += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='sheets-stand-in', daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency_seconds:
+            time.sleep(server.latency_seconds)
+
+        url = urlsplit(self.path)
+        if url.path == '/drive/v3/files':
+            server.count('files_list')
+            query = parse_qs(url.query).get('q', [''])[0]
+            title = re.search(r"name = '((?:[^'\\]|\\.)*)'", query)
+            title = re.sub(r"\\(.)", r"\1", title.group(1)) if title else None
+            files = []
+            if title in server.sheets.spreadsheets:
+                files.append({'id': server.spreadsheet_id(title), 'name': title})
+            return self._send_json(200, {'files': files})
+
+        match = re.match(r'/v4/spreadsheets/([^/]+)/values/(.+)$', url.path)
+        if match:
+            server.count('values_get')
+            titles = {server.spreadsheet_id(title): title for title in server.sheets.spreadsheets}
+            spreadsheet = server.sheets.spreadsheets.get(titles.get(match.group(1)))
+            worksheet_title = unquote(match.group(2)).strip("'").replace("''", "'")
+            if spreadsheet is None:
+                return self._send_json(404, {'error': {'message': 'Requested entity was not found.'}})
+            if worksheet_title not in spreadsheet.worksheets:
+                return self._send_json(400, {'error': {'message': f"Unable to parse range: {worksheet_title}"}})
+
+            rows = spreadsheet.worksheets[worksheet_title].get_all_values()
+            # Like the real API, trailing empty cells are trimmed
+            values = []
+            for row in rows:
+                while row and row[-1] == '':
+                    row = row[:-1]
+                values.append(row)
+            return self._send_json(200, {'range': worksheet_title, 'majorDimension': 'ROWS', 'values': values})
+
+        self._send_json(404, {'error': {'message': 'Not found'}})
+
+
+ARCHIVE_COLUMNS = [
+    'Date', 'Code', 'Emp Name', 'Eligible for Reimbursement', 'Reimbursement Amount', 'Amount Paid',
+    'Meal type', 'Company', 'Image_name', 'day', 'Month Year', 'UserID', 'Emp ID', 'Comment', 'Category'
+]
+
+
+def make_archive_rows(count, month_year='October 2025'):
+    """Header plus count matched, eligible Archive rows for one month"""
+    month_start = datetime.strptime(month_year, '%B %Y')
+    rows = [ARCHIVE_COLUMNS]
+    for index in range(count):
+        date = month_start.replace(day=index % 28 + 1)
+        user_id, emp_code = f"user{index % 50:02d}", f"TGLP{1000 + index % 50}"
+        rows.append([
+            date.strftime('%Y-%m-%d'), emp_code, user_id.capitalize(), 'Yes', '40', '60',
+            'Special Veg Thali', 'Grazitti Intractive', f"images/{user_id}/{month_year}/receipt_{index}.jpg",
+            str(date.day), date.strftime('%Y-%b'), user_id, emp_code, '', '1'
+        ])
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    arg_parser.add_argument('--rows', type=int, default=1000, help="Archive rows to serve")
+    arg_parser.add_argument('--spreadsheet', default='GRZ_Analytics_Lunch Reimbursement Sheet for HR (Lunch Reimbursemenet 2024)')
+    args = arg_parser.parse_args()
+
+    sheets = FakeSheetsClient()
+    sheets.set_rows(args.spreadsheet, 'Archive', make_archive_rows(args.rows))
+    server = SheetsStandIn(sheets, args.port, args.latency)
+    print(f"Serving '{args.spreadsheet}' at {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
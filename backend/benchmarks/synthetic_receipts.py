@@ -0,0 +1,137 @@
+"""Synthetic lunch receipt generator with known ground truth.
+
+Usage (from the backend directory):
+    python -m benchmarks.synthetic_receipts output_dir [--count 24] [--month-year "October 2025"]
+"""
+import os
+import json
+import random
+import argparse
+from datetime import datetime
+from PIL import Image, ImageDraw, ImageFont
+
+MEALS = ['Special Packed M', 'Special Veg Thali', 'Special Non Veg Thali']
+AMOUNTS = [40, 60, 80, 120]
+CODE_PREFIXES = ['TGLP', 'TGZM']
+COMPANY = 'Grazitti Intractive'
+
+DEFAULT_FORMATS = ['png', 'jpg', 'heic']
+DEFAULT_WIDTHS = [600, 1200, 2400]
+
+# Fonts tried in order; PIL's built-in bitmap font is the last resort
+FONT_CANDIDATES = ['DejaVuSans.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', 'Arial.ttf']
+
+
+def make_employee_code(rng):
+    return f"{rng.choice(CODE_PREFIXES)}{rng.randint(1000, 9999)}"
+
+
+def make_truth(rng, month_year, emp_code=None):
+    """Random receipt fields in the shapes OCREngine extracts them"""
+    month_start = datetime.strptime(month_year, '%B %Y')
+    date = month_start.replace(day=rng.randint(1, 28))
+    return {
+        'Date': date.strftime('%d-%b-%Y'),
+        'Code': emp_code or make_employee_code(rng),
+        'Amount': float(rng.choice(AMOUNTS)),
+        'Company': COMPANY,
+        'Meal': rng.choice(MEALS)
+    }
+
+
+def load_font(size):
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has a single fixed-size default font
+        return ImageFont.load_default()
+
+
+def render_receipt(truth, width):
+    """Draw a receipt; every number other than the amount stays in the top half"""
+    height = int(width * 1.5)
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    font = load_font(max(12, width // 18))
+    margin = width // 12
+
+    lines = [
+        (0.05, truth['Company']),
+        (0.13, 'Cafeteria Lunch Receipt'),
+        (0.21, f"Date: {truth['Date']}"),
+        (0.29, f"Emp Code: {truth['Code']}"),
+        (0.37, truth['Meal']),
+        (0.70, f"Total Rs {truth['Amount']:.2f}"),
+        (0.80, 'Thank you')
+    ]
+    for relative_y, text in lines:
+        draw.text((margin, int(height * relative_y)), text, fill='black', font=font)
+    return image
+
+
+def save_receipt(image, path, image_format):
+    """Save in the requested format; returns False when the format is unavailable here"""
+    if image_format == 'heic':
+        try:
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+        except ImportError:
+            return False
+        image.save(path, format='HEIF', quality=90)
+    elif image_format == 'jpg':
+        image.save(path, format='JPEG', quality=90)
+    else:
+        image.save(path, format='PNG')
+    return True
+
+
+def generate_receipts(output_dir, count, month_year, formats=None, widths=None, seed=0, emp_codes=None):
+    """Render count receipts cycling through formats x widths; returns one manifest entry per file"""
+    rng = random.Random(seed)
+    formats = formats or DEFAULT_FORMATS
+    widths = widths or DEFAULT_WIDTHS
+    os.makedirs(output_dir, exist_ok=True)
+
+    variants = [(image_format, width) for image_format in formats for width in widths]
+    receipts = []
+    skipped_formats = set()
+
+    for index in range(count):
+        image_format, width = variants[index % len(variants)]
+        if image_format in skipped_formats:
+            continue
+
+        emp_code = emp_codes[index % len(emp_codes)] if emp_codes else None
+        truth = make_truth(rng, month_year, emp_code)
+        path = os.path.join(output_dir, f"receipt_{index:04d}_{width}.{image_format}")
+        if not save_receipt(render_receipt(truth, width), path, image_format):
+            print(f"Skipping {image_format} receipts: format not available")
+            skipped_formats.add(image_format)
+            continue
+
+        receipts.append({'path': path, 'format': image_format, 'width': width, 'truth': truth})
+
+    return receipts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('output_dir')
+    arg_parser.add_argument('--count', type=int, default=24)
+    arg_parser.add_argument('--month-year', default='October 2025')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    receipts = generate_receipts(args.output_dir, args.count, args.month_year, seed=args.seed)
+    with open(os.path.join(args.output_dir, 'truth.json'), 'w') as truth_file:
+        json.dump(receipts, truth_file, indent=2)
+    print(f"Wrote {len(receipts)} receipts to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
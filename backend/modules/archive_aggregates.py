@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from .archive_cache import coerce_archive_types, month_key
+
+
+def _daily_totals(df):
+    df = df.dropna(subset=['Date'])
+    if df.empty:
+        return []
+
+    summary = df.groupby('Date').agg({
+        'Reimbursement Amount': 'sum',
+        'UserID': 'count'
+    }).reset_index()
+    summary.columns = ['date', 'total_amount', 'receipt_count']
+    summary['date'] = summary['date'].dt.strftime('%Y-%m-%d')
+    return summary.to_dict('records')
+
+
+def _employee_totals(df):
+    employee_summary = df.groupby(['Emp ID', 'Emp Name']).agg({
+        'Reimbursement Amount': 'sum'
+    }).reset_index()
+    employee_summary.columns = ['emp_id', 'name', 'total_reimbursement']
+    return employee_summary.to_dict('records')
+
+
+def build_month_aggregates(df):
+    """Compute dashboard aggregates for every 'Month Year' in an Archive frame"""
+    if df is None or df.empty or 'Month Year' not in df.columns:
+        return {}
+
+    df = coerce_archive_types(df.copy())
+    aggregates = {}
+    # Keys are lower-cased for case-insensitive lookups; rows without a month
+    # still count towards unfiltered totals under the '' key
+    for key, month_df in df.groupby(df['Month Year'].fillna('').astype(str).str.strip().str.lower()):
+        aggregates[key] = {
+            'total_receipts': len(month_df),
+            'total_approvals': int((month_df['Eligible for Reimbursement'] == 'Yes').sum()),
+            'rejected_receipts': int((month_df['Eligible for Reimbursement'] == 'No').sum()),
+            'pending_approvals': int((month_df['Category'] == '3').sum()),
+            'daily': _daily_totals(month_df),
+            'employees': _employee_totals(month_df)
+        }
+    return aggregates
+
+
+def merge_month_aggregates(month_aggregates):
+    """Combine several months' aggregates into one (for year-only or unfiltered views)"""
+    merged = {'total_receipts': 0, 'total_approvals': 0, 'rejected_receipts': 0, 'pending_approvals': 0}
+    daily = {}
+    employees = {}
+
+    for aggregate in month_aggregates:
+        for counter in merged:
+            merged[counter] += aggregate[counter]
+        for day in aggregate['daily']:
+            entry = daily.setdefault(day['date'], {'date': day['date'], 'total_amount': 0, 'receipt_count': 0})
+            entry['total_amount'] += day['total_amount']
+            entry['receipt_count'] += day['receipt_count']
+        for employee in aggregate['employees']:
+            key = (employee['emp_id'], employee['name'])
+            entry = employees.setdefault(key, {'emp_id': employee['emp_id'], 'name': employee['name'], 'total_reimbursement': 0})
+            entry['total_reimbursement'] += employee['total_reimbursement']
+
+    merged['daily'] = [daily[date] for date in sorted(daily)]
+    merged['employees'] = [employees[key] for key in sorted(employees, key=lambda key: (str(key[0]), str(key[1])))]
+    return merged
+
+
+class MonthAggregateStore:
+    """Materialised per-month dashboard aggregates, persisted as JSON and shared by all workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._aggregates = {}
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload_if_changed(self):
+        mtime = self._mtime()
+        if mtime is None or mtime == self._loaded_mtime:
+            return
+        try:
+            with open(self.path, 'r') as aggregates_file:
+                self._aggregates = json.load(aggregates_file)
+            self._loaded_mtime = mtime
+        except (OSError, ValueError) as e:
+            print(f"Error reading month aggregates {self.path}: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as aggregates_file:
+            json.dump(self._aggregates, aggregates_file, default=float)
+        os.replace(temp_path, self.path)
+        self._loaded_mtime = self._mtime()
+
+    def replace_all(self, aggregates):
+        """Replace every month, e.g. after a full Archive reload"""
+        with self._lock:
+            self._aggregates = aggregates
+            self._save()
+
+    def update_months(self, aggregates):
+        """Overwrite only the given months, e.g. those a month job just pushed"""
+        with self._lock:
+            self._reload_if_changed()
+            self._aggregates.update(aggregates)
+            self._save()
+
+    def lookup(self, year=None, month=None):
+        """Aggregates for year+month, a whole year, or everything, matching the Month Year filter rules"""
+        with self._lock:
+            self._reload_if_changed()
+            if year and month:
+                aggregate = self._aggregates.get(month_key(year, month))
+                matches = [aggregate] if aggregate else []
+            elif year:
+                prefix = f"{str(year).strip().lower()}-"
+                matches = [value for key, value in self._aggregates.items() if key.startswith(prefix)]
+            else:
+                matches = list(self._aggregates.values())
+
+        if len(matches) == 1:
+            return matches[0]
+        return merge_month_aggregates(matches)
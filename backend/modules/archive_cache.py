@@ -0,0 +1,138 @@
+import os
+import time
+import calendar
+import threading
+import pandas as pd
+
+_FULL_MONTH_NAMES = {name.lower(): name[:3].lower() for name in calendar.month_name if name}
+
+
+def month_key(year, month):
+    """Normalised 'Month Year' key (e.g. '2025-oct') accepting short or full month names"""
+    month = str(month).strip().lower()
+    return f"{str(year).strip()}-{_FULL_MONTH_NAMES.get(month, month)}"
+
+
+def coerce_archive_types(df):
+    """Parse Archive columns that the sheet returns as strings (in place)"""
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    if 'Reimbursement Amount' in df.columns:
+        df['Reimbursement Amount'] = pd.to_numeric(df['Reimbursement Amount'], errors='coerce').fillna(0)
+    if 'Category' in df.columns:
+        df['Category'] = df['Category'].astype(str)
+    return df
+
+
+class ArchiveSnapshot:
+    """Typed Archive frame with row positions indexed by month and year for exact filtering"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.month_positions = {}
+        self.year_positions = {}
+
+        if 'Month Year' in frame.columns and not frame.empty:
+            keys = frame['Month Year'].fillna('').astype(str).str.strip().str.lower()
+            self.month_positions = keys.groupby(keys.to_numpy()).indices
+            years = keys.str.split('-', n=1).str[0]
+            self.year_positions = years.groupby(years.to_numpy()).indices
+
+    def __len__(self):
+        return len(self.frame)
+
+    def select(self, year=None, month=None):
+        """Rows for year+month or a whole year; month alone does not filter (as before)"""
+        if 'Month Year' not in self.frame.columns or not year:
+            return self.frame
+
+        if month:
+            positions = self.month_positions.get(month_key(year, month))
+        else:
+            positions = self.year_positions.get(str(year).strip().lower())
+
+        if positions is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[positions]
+
+
+class ArchiveCache:
+    """TTL-cached DataFrame snapshot of the Archive sheet with single-flight refresh.
+    
+    Invalidation is signalled through a version file so that every worker process
+    sharing the output directory drops its snapshot when a month job pushes new data.
+    """
+
+    def __init__(self, loader, ttl_seconds=300, version_path=None):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.version_path = version_path
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._loaded_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.last_refresh_seconds = None
+        self.total_refresh_seconds = 0.0
+
+    def _current_version(self):
+        if not self.version_path:
+            return None
+        try:
+            return os.stat(self.version_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _is_fresh(self):
+        return (
+            self._snapshot is not None
+            and time.monotonic() - self._loaded_at < self.ttl_seconds
+            and self._loaded_version == self._current_version()
+        )
+
+    def get(self):
+        """Get the current snapshot, loading it once for all concurrent callers when stale"""
+        if self._is_fresh():
+            self.hits += 1
+            return self._snapshot
+
+        with self._lock:
+            # Another request may have refreshed while we waited for the lock
+            if self._is_fresh():
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            version = self._current_version()
+            start_time = time.perf_counter()
+            snapshot = self.loader()
+            self.last_refresh_seconds = time.perf_counter() - start_time
+            self.total_refresh_seconds += self.last_refresh_seconds
+
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            self._loaded_version = version
+            return snapshot
+
+    def invalidate(self):
+        """Drop the snapshot here and, via the version file, in every other worker"""
+        with self._lock:
+            self._snapshot = None
+        if self.version_path:
+            os.makedirs(os.path.dirname(self.version_path) or '.', exist_ok=True)
+            with open(self.version_path, 'w') as version_file:
+                version_file.write(str(time.time()))
+
+    def get_stats(self):
+        """Get hit rate and refresh latency"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'last_refresh_seconds': round(self.last_refresh_seconds, 3) if self.last_refresh_seconds is not None else None,
+            'avg_refresh_seconds': round(self.total_refresh_seconds / self.misses, 3) if self.misses else None,
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._snapshot is not None else None,
+            'rows': len(self._snapshot) if self._snapshot is not None else 0
+        }
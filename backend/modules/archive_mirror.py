@@ -0,0 +1,102 @@
+import os
+import time
+import sqlite3
+import threading
+import pandas as pd
+from .archive_cache import coerce_archive_types
+
+CATEGORICAL_COLUMNS = ['Category', 'Meal type', 'Eligible for Reimbursement']
+
+
+class ArchiveMirror:
+    """Local SQLite copy of the Archive sheet, read back with proper dtypes"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS mirror_meta (name TEXT PRIMARY KEY, value REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _to_storage(df):
+        """Store dates as ISO text so keys compare exactly and round-trip through SQLite"""
+        df = coerce_archive_types(df.copy())
+        if 'Date' in df.columns:
+            df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+        for column in df.columns:
+            if df[column].dtype == object or isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(object).where(df[column].notna(), None)
+        return df
+
+    def _has_table(self, conn):
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='archive'"
+        ).fetchone() is not None
+
+    def _set_meta(self, conn, name, value):
+        conn.execute("INSERT OR REPLACE INTO mirror_meta (name, value) VALUES (?, ?)", (name, value))
+
+    def replace(self, df):
+        """Replace the mirror with a full copy of the sheet and mark it reconciled"""
+        stored = self._to_storage(df)
+        with self._lock, self._connect() as conn:
+            if len(stored.columns):
+                stored.to_sql('archive', conn, if_exists='replace', index=False)
+            else:
+                conn.execute("DROP TABLE IF EXISTS archive")
+            self._set_meta(conn, 'reconciled_at', time.time())
+
+    def upsert(self, df, key_columns=('Date', 'UserID')):
+        """Replace rows sharing a key with df's rows, keeping the latest per key"""
+        key_columns = list(key_columns)
+        stored = self._to_storage(df).drop_duplicates(subset=key_columns, keep='last')
+
+        with self._lock, self._connect() as conn:
+            if not self._has_table(conn):
+                stored.to_sql('archive', conn, if_exists='replace', index=False)
+                return
+
+            table_columns = [row[1] for row in conn.execute("PRAGMA table_info(archive)")]
+            if table_columns != stored.columns.tolist():
+                # Schema changed: merge in pandas and rewrite the table
+                existing = pd.read_sql('SELECT * FROM archive', conn)
+                merged = pd.concat([existing, stored], ignore_index=True)
+                merged = merged.drop_duplicates(subset=key_columns, keep='last')
+                merged.to_sql('archive', conn, if_exists='replace', index=False)
+                return
+
+            where_clause = ' AND '.join(f'"{column}" IS ?' for column in key_columns)
+            conn.executemany(
+                f"DELETE FROM archive WHERE {where_clause}",
+                stored[key_columns].astype(object).itertuples(index=False, name=None)
+            )
+            stored.to_sql('archive', conn, if_exists='append', index=False)
+
+    def read(self, query='SELECT * FROM archive', params=()):
+        """Read mirrored rows as a typed DataFrame (empty if never synced)"""
+        with self._connect() as conn:
+            if not self._has_table(conn):
+                return pd.DataFrame()
+            df = pd.read_sql(query, conn, params=params)
+
+        df = coerce_archive_types(df)
+        for column in CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        return df
+
+    def reconciled_at(self):
+        """Unix time of the last full sync from the sheet, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM mirror_meta WHERE name = 'reconciled_at'").fetchone()
+        return row[0] if row else None
+
+    def needs_reconcile(self, max_age_seconds):
+        reconciled_at = self.reconciled_at()
+        return reconciled_at is None or time.time() - reconciled_at > max_age_seconds
@@ -0,0 +1,206 @@
+import time
+import random
+import asyncio
+from collections import deque
+from urllib.parse import quote
+import httpx
+import pandas as pd
+from .metrics import sheets_call
+
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SingleFlight:
+    """Coalesce concurrent awaits of the same key into one in-flight call"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, coroutine_function, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(coroutine_function(*args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # A cancelled waiter must not cancel the call the other waiters share
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            # Mark the exception retrieved; every waiter re-raises it anyway
+            future.exception()
+
+
+class AsyncSheetsClient:
+    """Non-blocking Sheets/Drive REST reads over a pooled httpx client.
+
+    Identical concurrent reads share one request, at most max_concurrent_requests are
+    in flight and requests_per_minute caps the rate, so concurrent dashboard users
+    cannot exhaust the Sheets quota. Base URLs are configurable so it can run against
+    a local HTTP stand-in (see benchmarks/sheets_server.py).
+    """
+
+    def __init__(self, config, transport=None):
+        api_config = config['gsheets'].get('api', {})
+        self.credentials_path = config['gsheets']['credentials_path']
+        self.sheets_base_url = api_config.get('sheets_base_url', 'https://sheets.googleapis.com').rstrip('/')
+        self.drive_base_url = api_config.get('drive_base_url', 'https://www.googleapis.com').rstrip('/')
+        self.authenticate = api_config.get('authenticate', True)
+        self.requests_per_minute = api_config.get('requests_per_minute', 15)
+        self.max_retries = api_config.get('max_retries', 3)
+        self.retry_backoff_seconds = api_config.get('retry_backoff_seconds', 1.0)
+        max_connections = api_config.get('max_connections', 10)
+
+        self._client = httpx.AsyncClient(
+            timeout=api_config.get('timeout_seconds', 30),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+        self._semaphore = asyncio.Semaphore(api_config.get('max_concurrent_requests', 4))
+        self._quota_lock = asyncio.Lock()
+        self._sent_at = deque()
+        self._single_flight = SingleFlight()
+        self._spreadsheet_ids = {}
+        self._credentials = None
+        self._token = None
+        self._token_expires_at = 0.0
+        self.requests = 0
+        self.retries = 0
+
+    async def _access_token(self):
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        return await self._single_flight.run('token', self._refresh_token)
+
+    async def _refresh_token(self):
+        def refresh():
+            from oauth2client.service_account import ServiceAccountCredentials
+            if self._credentials is None:
+                self._credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, SCOPE)
+            return self._credentials.get_access_token()
+
+        # oauth2client is blocking, so the token exchange runs in a worker thread
+        with sheets_call('token'):
+            token_info = await asyncio.to_thread(refresh)
+        self._token = token_info.access_token
+        # Refresh a minute early so in-flight requests never carry an expired token
+        self._token_expires_at = time.monotonic() + max((token_info.expires_in or 0) - 60, 0)
+        return self._token
+
+    async def _acquire_quota(self):
+        """Wait until a request fits in the per-minute budget"""
+        if not self.requests_per_minute:
+            return
+        async with self._quota_lock:
+            now = time.monotonic()
+            while self._sent_at and now - self._sent_at[0] >= 60:
+                self._sent_at.popleft()
+            if len(self._sent_at) >= self.requests_per_minute:
+                await asyncio.sleep(60 - (now - self._sent_at[0]))
+                self._sent_at.popleft()
+            self._sent_at.append(time.monotonic())
+
+    async def _get_json(self, operation, url, params=None):
+        """GET url with quota, concurrency limit and retries on 429/5xx"""
+        for attempt in range(self.max_retries + 1):
+            headers = {}
+            if self.authenticate:
+                headers['Authorization'] = f"Bearer {await self._access_token()}"
+
+            await self._acquire_quota()
+            async with self._semaphore:
+                self.requests += 1
+                with sheets_call(operation):
+                    response = await self._client.get(url, params=params, headers=headers)
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                        response.raise_for_status()
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response.json()
+
+            self.retries += 1
+            retry_after = response.headers.get('Retry-After')
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else (
+                self.retry_backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1)
+            )
+            print(f"Retrying Sheets {operation} in {delay:.1f}s after HTTP {response.status_code}")
+            await asyncio.sleep(delay)
+
+    async def _lookup_spreadsheet_id(self, spreadsheet_title):
+        escaped_title = spreadsheet_title.replace('\\', '\\\\').replace("'", "\\'")
+        payload = await self._get_json('files_list', f"{self.drive_base_url}/drive/v3/files", {
+            'q': f"name = '{escaped_title}' and mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false",
+            'fields': 'files(id,name)',
+            'supportsAllDrives': 'true',
+            'includeItemsFromAllDrives': 'true'
+        })
+        files = payload.get('files', [])
+        return files[0]['id'] if files else None
+
+    async def spreadsheet_id(self, spreadsheet_title):
+        """Resolve a spreadsheet title to its id, like gspread's open(title)"""
+        if spreadsheet_title not in self._spreadsheet_ids:
+            spreadsheet_id = await self._single_flight.run(
+                ('id', spreadsheet_title), self._lookup_spreadsheet_id, spreadsheet_title
+            )
+            if spreadsheet_id is None:
+                return None
+            self._spreadsheet_ids[spreadsheet_title] = spreadsheet_id
+        return self._spreadsheet_ids[spreadsheet_title]
+
+    async def _fetch_values(self, spreadsheet_title, worksheet_title):
+        spreadsheet_id = await self.spreadsheet_id(spreadsheet_title)
+        if spreadsheet_id is None:
+            print(f"Spreadsheet '{spreadsheet_title}' not found.")
+            return None
+
+        sheet_range = "'{}'".format(worksheet_title.replace("'", "''"))
+        try:
+            payload = await self._get_json(
+                'values_get',
+                f"{self.sheets_base_url}/v4/spreadsheets/{spreadsheet_id}/values/{quote(sheet_range, safe='')}",
+                {'majorDimension': 'ROWS', 'valueRenderOption': 'FORMATTED_VALUE'}
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 400:
+                # Sheets answers 400 "Unable to parse range" for a missing worksheet
+                print(f"Worksheet '{worksheet_title}' not found.")
+                return None
+            raise
+
+        rows = payload.get('values', [])
+        # The API trims trailing empty cells; pad like gspread's get_all_values
+        width = max((len(row) for row in rows), default=0)
+        return [row + [''] * (width - len(row)) for row in rows]
+
+    async def get_all_values(self, spreadsheet_title, worksheet_title):
+        """All cell values of a worksheet as rows of strings, or None if it does not exist"""
+        return await self._single_flight.run(
+            ('values', spreadsheet_title, worksheet_title), self._fetch_values, spreadsheet_title, worksheet_title
+        )
+
+    async def read_sheet_data(self, spreadsheet_title, worksheet_title):
+        """Async counterpart of PostProcessor.read_sheet_data"""
+        data = await self.get_all_values(spreadsheet_title, worksheet_title)
+        if not data:
+            return None
+        return pd.DataFrame(data[1:], columns=data[0])
+
+    def get_stats(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'calls': self._single_flight.calls,
+            'coalesced': self._single_flight.coalesced
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
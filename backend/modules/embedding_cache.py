@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from .metrics import EMBEDDING_CACHE_REQUESTS, EMBEDDING_ENCODE_SECONDS
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of unit-normalised sentence embeddings keyed by text"""
+
+    def __init__(self, sentence_model, max_size=50000):
+        self.sentence_model = sentence_model
+        self.max_size = max_size
+        self._embeddings = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, texts):
+        """Encode texts into a (len(texts), dim) matrix, only running the model for unseen texts"""
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = [str(text) for text in texts]
+
+        with self._lock:
+            missing = [text for text in dict.fromkeys(texts) if text not in self._embeddings]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        EMBEDDING_CACHE_REQUESTS.labels('hit').inc(len(texts) - len(missing))
+        EMBEDDING_CACHE_REQUESTS.labels('miss').inc(len(missing))
+
+        if missing:
+            # Encode outside the lock so concurrent receipts are not serialised on cache access
+            with EMBEDDING_ENCODE_SECONDS.time():
+                vectors = np.asarray(self.sentence_model.encode(missing, convert_to_numpy=True), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+            with self._lock:
+                for text, vector in zip(missing, vectors):
+                    self._embeddings[text] = vector
+
+        with self._lock:
+            rows = []
+            for text in texts:
+                vector = self._embeddings.get(text)
+                if vector is None:
+                    # Evicted by a concurrent caller between encode and lookup
+                    vector = self._embeddings[text] = self._encode_one(text)
+                self._embeddings.move_to_end(text)
+                rows.append(vector)
+            while len(self._embeddings) > self.max_size:
+                self._embeddings.popitem(last=False)
+
+        if not rows:
+            return np.empty((0, self.sentence_model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack(rows)
+
+    def _encode_one(self, text):
+        vector = np.asarray(self.sentence_model.encode(text, convert_to_numpy=True), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_stats(self):
+        """Get cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._embeddings),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
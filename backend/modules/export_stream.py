@@ -0,0 +1,112 @@
+import zlib
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet')
+}
+
+
+class ExportFormatError(ValueError):
+    """Requested export format is unknown or its optional dependency is missing"""
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportFormatError("Parquet export requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+class _PositionSink:
+    """Write-only file object for ParquetWriter that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_csv(df, chunk_rows=5000):
+    """Yield df as UTF-8 CSV, chunk_rows rows at a time"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode('utf-8')
+
+
+def iter_gzip(chunks, level=6):
+    """Gzip a stream of byte chunks on the fly"""
+    # wbits=31 selects the gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _parquet_chunk(df):
+    # Sheet columns can mix ints and strings; Parquet needs one type per column
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].astype('string')
+    return df
+
+
+def iter_parquet(df, chunk_rows=50000):
+    """Yield df as a Parquet file, one row group per chunk_rows rows"""
+    pyarrow, parquet = _import_pyarrow()
+    sink = _PositionSink()
+    schema = pyarrow.Schema.from_pandas(_parquet_chunk(df.head(0)), preserve_index=False)
+
+    with parquet.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = _parquet_chunk(df.iloc[start:start + chunk_rows])
+            writer.write_table(pyarrow.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+
+    # Footer is written on close
+    yield sink.drain()
+
+
+def check_export_format(export_format):
+    """Raise ExportFormatError if export_format is unknown or its optional dependency is missing"""
+    if export_format not in EXPORT_FORMATS:
+        raise ExportFormatError(f"Unknown export format: {export_format}")
+    if export_format == 'parquet':
+        _import_pyarrow()
+
+
+def stream_export(df, export_format='csv'):
+    """Return a byte-chunk generator rendering df in export_format"""
+    # Fail before the response starts rather than midway through it
+    check_export_format(export_format)
+
+    if export_format == 'parquet':
+        return iter_parquet(df)
+    if export_format == 'csv.gz':
+        return iter_gzip(iter_csv(df))
+    return iter_csv(df)
@@ -1,40 +1,248 @@
 import os
+import json
+import time
+import random
+import threading
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pydrive.auth import GoogleAuth
 from pydrive.drive import GoogleDrive
 from .utils import load_config
+from .metrics import drive_call, DRIVE_DOWNLOAD_BYTES
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class DownloadManifest:
+    """Local record of Drive file id -> modifiedDate/md5Checksum for files already downloaded"""
+    
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.entries = {}
+        
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r') as manifest_file:
+                    self.entries = json.load(manifest_file)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {manifest_path}: {e}")
+    
+    def is_current(self, item, local_path):
+        """Check whether local_path already holds this revision of the Drive file"""
+        entry = self.entries.get(item['id'])
+        return (
+            entry is not None
+            and entry['path'] == local_path
+            and entry.get('md5Checksum') == item.get('md5Checksum')
+            and entry.get('modifiedDate') == item.get('modifiedDate')
+            and os.path.exists(local_path)
+        )
+    
+    def record(self, item, local_path):
+        self.entries[item['id']] = {
+            'path': local_path,
+            'md5Checksum': item.get('md5Checksum'),
+            'modifiedDate': item.get('modifiedDate')
+        }
+    
+    def save(self):
+        """Write manifest atomically"""
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(self.entries, manifest_file)
+        os.replace(temp_path, self.manifest_path)
+
 
 class GDriveDownloader:
-    def __init__(self, config=None):
+    def __init__(self, config=None, drive=None):
         self.config = config or load_config()
-        self.drive = self._authenticate()
+        # Any object with PyDrive's ListFile(params).GetList() / item.GetContentFile(path) interface works
+        self.drive = drive or self._authenticate()
+        self.last_sync_stats = {'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+        self._thread_local = threading.local()
     
     def _authenticate(self):
         """Authenticate with Google Drive"""
         gauth = GoogleAuth()
         return GoogleDrive(gauth)
     
-    def download_folder_contents(self, folder_id, download_path):
-        """Download files and subfolders from specified folder"""
-        file_list = self.drive.ListFile({'q': f"'{folder_id}' in parents and trashed=false"}).GetList()
+    def _thread_drive(self):
+        """Drive client for the calling download thread, with its own authorised Http.
         
-        for item in file_list:
-            item_path = os.path.join(download_path, item['title'])
-            
-            if item['mimeType'] == 'application/vnd.google-apps.folder':
-                self.download_folder_contents(item['id'], item_path)
+        PyDrive 1.x sends every request through auth.service._http, and httplib2.Http is
+        not thread-safe, so download threads must not share the listing client.
+        """
+        drive = getattr(self._thread_local, 'drive', None)
+        if drive is None:
+            base_auth = getattr(self.drive, 'auth', None)
+            if base_auth is None or base_auth.credentials is None:
+                # Stand-ins without PyDrive auth are used as they are
+                drive = self.drive
             else:
-                print(f"Downloading file: {item['title']} to {item_path}")
-                item.GetContentFile(item_path)
+                auth = GoogleAuth()
+                auth.credentials = base_auth.credentials
+                auth.Authorize()
+                drive = GoogleDrive(auth)
+            self._thread_local.drive = drive
+        return drive
     
-    def download_employee_data(self, root_folder_name, download_folder, target_subfolder_name):
-        """Download employee data from Google Drive"""
+    def list_children(self, parent_ids, folders_only=False):
+        """List children of many folders with batched 'in parents' queries, grouped by parent id"""
+        parent_ids = list(parent_ids)
+        children = {parent_id: [] for parent_id in parent_ids}
+        batch_size = self.config['gdrive'].get('list_batch_size', 50)
+        
+        for start in range(0, len(parent_ids), batch_size):
+            batch = parent_ids[start:start + batch_size]
+            parents_clause = ' or '.join(f"'{parent_id}' in parents" for parent_id in batch)
+            query = f"({parents_clause}) and trashed=false"
+            if folders_only:
+                query += f" and mimeType='{FOLDER_MIME_TYPE}'"
+            
+            # No maxResults: with it set, PyDrive's GetList() returns only the first page
+            with drive_call('list'):
+                items = self.drive.ListFile({'q': query}).GetList()
+            for item in items:
+                for parent in item.get('parents', []):
+                    if parent['id'] in children:
+                        children[parent['id']].append(item)
+        
+        return children
+    
+    def _plan_downloads(self, folder_paths, manifest=None, file_callback=None):
+        """Walk the given {folder id: local path} roots level by level and list files that need downloading"""
+        pending = []
+        
+        while folder_paths:
+            children = self.list_children(folder_paths.keys())
+            next_level = {}
+            
+            for folder_id, items in children.items():
+                download_path = folder_paths[folder_id]
+                os.makedirs(download_path, exist_ok=True)
+                
+                for item in items:
+                    item_path = os.path.join(download_path, item['title'])
+                    
+                    if item['mimeType'] == FOLDER_MIME_TYPE:
+                        next_level[item['id']] = item_path
+                    elif manifest is not None and manifest.is_current(item, item_path):
+                        self.last_sync_stats['skipped'] += 1
+                        if file_callback:
+                            file_callback(item_path)
+                    else:
+                        pending.append((item, item_path))
+            
+            folder_paths = next_level
+        
+        return pending
+    
+    def _download_with_retry(self, item, item_path):
+        """Download one file, retrying with exponential backoff; returns bytes written"""
+        gdrive_config = self.config['gdrive']
+        max_retries = gdrive_config.get('max_retries', 4)
+        backoff_seconds = gdrive_config.get('retry_backoff_seconds', 1.0)
+        
+        drive = self._thread_drive()
+        # Rebind the listed metadata to this thread's client so the download uses its Http
+        drive_file = item if drive is self.drive else drive.CreateFile(dict(item))
+        
+        for attempt in range(max_retries + 1):
+            try:
+                with drive_call('download'):
+                    drive_file.GetContentFile(item_path)
+                file_bytes = os.path.getsize(item_path)
+                DRIVE_DOWNLOAD_BYTES.inc(file_bytes)
+                return file_bytes
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                delay = backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1)
+                print(f"Retrying {item['title']} in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+    
+    def _download_trees(self, folder_paths, manifest=None, progress_callback=None, file_callback=None):
+        """Download every file below the given {folder id: local path} roots with bounded concurrency.
+        
+        file_callback is called with the local path of every file that is ready on disk,
+        whether it was just downloaded or already current.
+        """
+        pending = self._plan_downloads(folder_paths, manifest, file_callback)
+        files_total = len(pending)
+        files_done = 0
+        bytes_done = 0
+        start_time = time.perf_counter()
+        
+        def report():
+            if progress_callback:
+                elapsed = max(time.perf_counter() - start_time, 1e-6)
+                progress_callback({
+                    'files_done': files_done,
+                    'files_total': files_total,
+                    'files_skipped': self.last_sync_stats['skipped'],
+                    'files_failed': self.last_sync_stats['failed'],
+                    'bytes_done': bytes_done,
+                    'files_per_second': round(files_done / elapsed, 2),
+                    'bytes_per_second': round(bytes_done / elapsed, 1)
+                })
+        
+        report()
+        if not pending:
+            return
+        
+        max_workers = max(1, self.config['gdrive'].get('download_workers', 8))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._download_with_retry, item, item_path): (item, item_path)
+                for item, item_path in pending
+            }
+            
+            try:
+                for future in as_completed(futures):
+                    item, item_path = futures[future]
+                    try:
+                        file_bytes = future.result()
+                    except Exception as e:
+                        print(f"Failed to download {item['title']}: {e}")
+                        self.last_sync_stats['failed'] += 1
+                        report()
+                        continue
+                    
+                    files_done += 1
+                    bytes_done += file_bytes
+                    self.last_sync_stats['downloaded'] += 1
+                    self.last_sync_stats['bytes'] += file_bytes
+                    if manifest is not None:
+                        manifest.record(item, item_path)
+                    report()
+                    if file_callback:
+                        file_callback(item_path)
+            except BaseException:
+                # e.g. the job was cancelled from a callback: drop downloads that have not started
+                for future in futures:
+                    future.cancel()
+                raise
+    
+    def download_folder_contents(self, folder_id, download_path):
+        """Download files and subfolders from specified folder"""
+        self._download_trees({folder_id: download_path})
+    
+    def download_employee_data(self, root_folder_name, download_folder, target_subfolder_name, incremental=None,
+                               progress_callback=None, file_callback=None):
+        """Download employee data from Google Drive, skipping files unchanged since the last sync"""
+        gdrive_config = self.config['gdrive']
+        if incremental is None:
+            incremental = gdrive_config.get('incremental_sync', True)
+        
         os.makedirs(download_folder, exist_ok=True)
         employee_names = []
+        self.last_sync_stats = {'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
         
         # Find root folder
-        root_folder_query = f"title='{root_folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        root_folder_list = self.drive.ListFile({'q': root_folder_query}).GetList()
+        root_folder_query = f"title='{root_folder_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+        with drive_call('list'):
+            root_folder_list = self.drive.ListFile({'q': root_folder_query}).GetList()
         
         if not root_folder_list:
             print(f"Root folder '{root_folder_name}' not found.")
@@ -43,27 +251,35 @@ class GDriveDownloader:
         root_folder = root_folder_list[0]
         
         # Get employee folders
-        employee_folders_query = f"'{root_folder['id']}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        employee_folders = self.drive.ListFile({'q': employee_folders_query}).GetList()
+        employee_folders = self.list_children([root_folder['id']], folders_only=True)[root_folder['id']]
         
-        # Download from each employee folder
+        # Get every employee's date folders with batched queries instead of one per employee
+        date_folders = self.list_children([folder['id'] for folder in employee_folders], folders_only=True)
+        
+        target_folders = {}
         for employee_folder in employee_folders:
             employee_name = employee_folder['title']
             
-            employee_folder_query = f"'{employee_folder['id']}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            date_folders = self.drive.ListFile({'q': employee_folder_query}).GetList()
-            
-            for date_folder in date_folders:
+            for date_folder in date_folders[employee_folder['id']]:
                 if date_folder['title'].lower() == target_subfolder_name.lower():
                     date_folder_path = os.path.join(download_folder, employee_name, date_folder['title'])
-                    os.makedirs(date_folder_path, exist_ok=True)
-                    
-                    print(f"Downloading data from {employee_name}'s folder, {date_folder['title']}")
-                    self.download_folder_contents(date_folder['id'], date_folder_path)
+                    target_folders[date_folder['id']] = date_folder_path
                     employee_names.append(employee_name)
                     break  # Only add once per employee
         
-        print("Download completed.")
+        manifest = None
+        if incremental:
+            manifest_path = gdrive_config.get('manifest_path') or os.path.join(download_folder, '.drive_manifest.json')
+            manifest = DownloadManifest(manifest_path)
+        
+        print(f"Downloading data from {len(target_folders)} employee folders for {target_subfolder_name}")
+        try:
+            self._download_trees(target_folders, manifest, progress_callback, file_callback)
+        finally:
+            if manifest is not None:
+                manifest.save()
+        
+        print(f"Download completed. {self.last_sync_stats}")
         return employee_names
     
     def get_employee_names_df(self, root_folder_name, target_subfolder_name):
@@ -0,0 +1,72 @@
+import time
+import threading
+import numpy as np
+from PIL import Image, ImageOps
+from .utils import get_rss_mb
+
+_heif_lock = threading.Lock()
+_heif_registered = False
+
+
+def register_heif_opener():
+    """Teach PIL to open HEIC/HEIF files; registration happens once per process"""
+    global _heif_registered
+    with _heif_lock:
+        if not _heif_registered:
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+            _heif_registered = True
+
+
+class ImageLoader:
+    """Decode receipt images once into upright, size-capped RGB uint8 arrays"""
+
+    def __init__(self, max_side=1600):
+        self.max_side = max_side
+        self._lock = threading.Lock()
+        self._stats = {'images': 0, 'failed': 0, 'downscaled': 0, 'decode_seconds': 0.0,
+                       'max_decode_seconds': 0.0, 'max_source_mb': 0.0, 'peak_rss_mb': 0.0}
+
+    def load(self, image_path):
+        """Decode image_path, or return None if it cannot be read"""
+        start_time = time.perf_counter()
+        try:
+            if image_path.lower().endswith(('.heic', '.heif')):
+                register_heif_opener()
+
+            with Image.open(image_path) as image:
+                source_size = image.size
+                # JPEG can decode straight at a reduced scale, skipping most of the full-size work
+                image.draft('RGB', (self.max_side, self.max_side))
+                # Phone photos are usually stored sideways with an EXIF orientation tag
+                image = ImageOps.exif_transpose(image)
+                if max(image.size) > self.max_side:
+                    image.thumbnail((self.max_side, self.max_side), Image.Resampling.LANCZOS)
+                page = np.asarray(image.convert('RGB'), dtype=np.uint8)
+        except Exception as e:
+            print(f"Error reading image {image_path}: {e}")
+            with self._lock:
+                self._stats['failed'] += 1
+            return None
+
+        self._record(time.perf_counter() - start_time, source_size, max(page.shape[:2]) < max(source_size))
+        return page
+
+    def _record(self, seconds, source_size, downscaled):
+        # Full-resolution RGB size is what the old loaders held in memory per image
+        source_mb = source_size[0] * source_size[1] * 3 / (1024 * 1024)
+        rss_mb = get_rss_mb()
+        with self._lock:
+            self._stats['images'] += 1
+            self._stats['downscaled'] += int(downscaled)
+            self._stats['decode_seconds'] += seconds
+            self._stats['max_decode_seconds'] = max(self._stats['max_decode_seconds'], seconds)
+            self._stats['max_source_mb'] = max(self._stats['max_source_mb'], source_mb)
+            self._stats['peak_rss_mb'] = max(self._stats['peak_rss_mb'], rss_mb)
+
+    def get_stats(self):
+        """Decode counts, timings and memory high-water marks"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_decode_seconds'] = stats['decode_seconds'] / stats['images'] if stats['images'] else 0.0
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+ACTIVE_STATES = ('queued', 'running')
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested"""
+
+
+class JobStore:
+    """SQLite-backed month job records shared by every worker process.
+    
+    Queued and running jobs are leased to the process that accepted them: heartbeat()
+    keeps the lease alive, and expire_stale_jobs() fails jobs whose owner stopped
+    renewing it, so a dead worker can never keep a month locked.
+    """
+
+    def __init__(self, db_path, lease_seconds=60):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        # Identifies this process's jobs; PIDs are reused across container restarts
+        self.owner_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, month_year TEXT NOT NULL, state TEXT NOT NULL, "
+                "progress INTEGER NOT NULL DEFAULT 0, status TEXT, details TEXT, result TEXT, error TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, worker_pid INTEGER, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (('owner_id', 'TEXT'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_month_state ON jobs(month_year, state)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, month_year):
+        """Queue a job for month_year, or return the active one; returns (job_id, created)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so two workers cannot both insert
+            conn.execute("BEGIN IMMEDIATE")
+            # A job left behind by a dead worker must not block its month
+            self._expire_stale(conn, now)
+            placeholders = ', '.join('?' for _ in ACTIVE_STATES)
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE month_year = ? AND state IN ({placeholders})",
+                (month_year, *ACTIVE_STATES)
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row['id'], False
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, month_year, state, progress, status, details, owner_id, worker_pid, "
+                "heartbeat_at, created_at, updated_at) VALUES (?, ?, 'queued', 0, 'Starting...', '{}', ?, ?, ?, ?, ?)",
+                (job_id, month_year, self.owner_id, os.getpid(), now, now, now)
+            )
+            conn.execute("COMMIT")
+            return job_id, True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _execute(self, query, params):
+        conn = self._connect()
+        try:
+            return conn.execute(query, params).rowcount
+        finally:
+            conn.close()
+
+    def claim(self, job_id):
+        """Mark a queued job as running in this process; False if it was cancelled meanwhile"""
+        now = time.time()
+        return self._execute(
+            "UPDATE jobs SET state = 'running', owner_id = ?, worker_pid = ?, heartbeat_at = ?, updated_at = ? "
+            "WHERE id = ? AND state = 'queued'",
+            (self.owner_id, os.getpid(), now, now, job_id)
+        ) == 1
+
+    def update(self, job_id, fields):
+        """Update progress/status and merge any other fields into the job's details"""
+        fields = dict(fields)
+        progress = fields.pop('progress', None)
+        status = fields.pop('status', None)
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT details FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return
+                details = json.loads(row['details'] or '{}')
+                details.update(fields)
+                conn.execute(
+                    "UPDATE jobs SET progress = COALESCE(?, progress), status = COALESCE(?, status), "
+                    "details = ?, updated_at = ? WHERE id = ?",
+                    (progress, status, json.dumps(details, default=str), time.time(), job_id)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def finish(self, job_id, state, status, progress=None, result=None, error=None):
+        """Record a job's final state"""
+        self._execute(
+            "UPDATE jobs SET state = ?, status = ?, progress = COALESCE(?, progress), result = ?, error = ?, "
+            "updated_at = ? WHERE id = ?",
+            (state, status, progress, json.dumps(result, default=str) if result is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def request_cancel(self, job_id):
+        """Flag a job for cancellation (queued jobs are cancelled immediately); returns the job or None"""
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET state = 'cancelled', status = 'Cancelled', cancel_requested = 1, updated_at = ? "
+            "WHERE id = ? AND state = 'queued'",
+            (now, job_id)
+        )
+        self._execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND state = 'running'",
+            (now, job_id)
+        )
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row['cancel_requested'])
+
+    def heartbeat(self):
+        """Renew the lease on every active job this process owns"""
+        placeholders = ', '.join('?' for _ in ACTIVE_STATES)
+        self._execute(
+            f"UPDATE jobs SET heartbeat_at = ? WHERE owner_id = ? AND state IN ({placeholders})",
+            (time.time(), self.owner_id, *ACTIVE_STATES)
+        )
+
+    def _expire_stale(self, conn, now):
+        placeholders = ', '.join('?' for _ in ACTIVE_STATES)
+        return conn.execute(
+            "UPDATE jobs SET state = 'failed', status = 'Error: worker stopped before the job finished', "
+            f"error = 'Worker stopped before the job finished', updated_at = ? WHERE state IN ({placeholders}) "
+            "AND COALESCE(heartbeat_at, updated_at) < ?",
+            (now, *ACTIVE_STATES, now - self.lease_seconds)
+        ).rowcount
+
+    def expire_stale_jobs(self):
+        """Fail queued or running jobs whose owner has not renewed its lease (crashed or restarted worker)"""
+        conn = self._connect()
+        try:
+            return self._expire_stale(conn, time.time())
+        finally:
+            conn.close()
+
+    def release_queued_jobs(self):
+        """Fail this process's jobs that never started, e.g. when its executor shuts down"""
+        now = time.time()
+        return self._execute(
+            "UPDATE jobs SET state = 'failed', status = 'Error: worker shut down before the job started', "
+            "error = 'Worker shut down before the job started', updated_at = ? "
+            "WHERE owner_id = ? AND state = 'queued'",
+            (now, self.owner_id)
+        )
+
+    @staticmethod
+    def _to_dict(row):
+        job = json.loads(row['details'] or '{}')
+        job.update({
+            'job_id': row['id'],
+            'month_year': row['month_year'],
+            'state': row['state'],
+            'progress': row['progress'],
+            'status': row['status'],
+            'completed': row['state'] in FINISHED_STATES,
+            'cancel_requested': bool(row['cancel_requested']),
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        })
+        if row['result']:
+            job['result'] = json.loads(row['result'])
+        return job
+
+    def get(self, job_id):
+        """Get a job in the progress-store shape the frontend polls, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, limit=50):
+        """Most recent jobs first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [self._to_dict(row) for row in rows]
+
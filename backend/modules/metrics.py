@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from prometheus_client import (
+    REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+# Under gunicorn every worker (and OCR pool process) writes its samples to
+# PROMETHEUS_MULTIPROC_DIR and /metrics aggregates them; see start.sh
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template',
+    ['method', 'route', 'status'], buckets=FAST_BUCKETS + (30, 60)
+)
+OCR_MODEL_SECONDS = Histogram(
+    'ocr_model_seconds', 'doctr forward pass time per call', ['stage'], buckets=FAST_BUCKETS
+)
+EMBEDDING_ENCODE_SECONDS = Histogram(
+    'embedding_encode_seconds', 'Sentence model encode time for cache misses', buckets=FAST_BUCKETS
+)
+EMBEDDING_CACHE_REQUESTS = Counter('embedding_cache_requests_total', 'Embedding cache lookups', ['result'])
+OCR_CACHE_REQUESTS = Counter('ocr_result_cache_requests_total', 'OCR result cache lookups', ['result'])
+DRIVE_REQUEST_SECONDS = Histogram(
+    'drive_request_seconds', 'Drive API call latency (one download attempt or listing)',
+    ['operation'], buckets=FAST_BUCKETS + (30, 60)
+)
+DRIVE_REQUESTS = Counter('drive_requests_total', 'Drive API calls', ['operation', 'outcome'])
+DRIVE_DOWNLOAD_BYTES = Counter('drive_download_bytes_total', 'Bytes downloaded from Drive')
+SHEETS_REQUEST_SECONDS = Histogram(
+    'sheets_request_seconds', 'Google Sheets API call latency', ['operation'], buckets=FAST_BUCKETS + (30, 60)
+)
+SHEETS_REQUESTS = Counter('sheets_requests_total', 'Google Sheets API calls', ['operation', 'outcome'])
+PIPELINE_STAGE_SECONDS = Histogram(
+    'pipeline_stage_seconds', 'Streaming pipeline work per item or batch', ['stage'], buckets=FAST_BUCKETS
+)
+JOB_STAGE_SECONDS = Histogram('job_stage_seconds', 'Month job stage durations', ['stage'], buckets=SLOW_BUCKETS)
+JOBS_FINISHED = Counter('jobs_finished_total', 'Month jobs by final state', ['state'])
+
+
+@contextmanager
+def observe_call(histogram, counter, operation):
+    """Time a remote call and count it by outcome"""
+    start_time = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        histogram.labels(operation).observe(time.perf_counter() - start_time)
+        counter.labels(operation, outcome).inc()
+
+
+def sheets_call(operation):
+    return observe_call(SHEETS_REQUEST_SECONDS, SHEETS_REQUESTS, operation)
+
+
+def drive_call(operation):
+    return observe_call(DRIVE_REQUEST_SECONDS, DRIVE_REQUESTS, operation)
+
+
+class StageTimer:
+    """Record consecutive job stage durations: mark(stage) observes time since the previous mark.
+    
+    Durations are also kept in seconds ({stage: seconds}) for the job result.
+    """
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.seconds = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        elapsed = now - self._last
+        JOB_STAGE_SECONDS.labels(stage).observe(elapsed)
+        self.seconds[stage] = round(self.seconds.get(stage, 0.0) + elapsed, 3)
+        self._last = now
+
+
+def instrument_ocr_predictor(predictor):
+    """Time doctr's detection and recognition sub-models through forward hooks"""
+    timings = threading.local()
+
+    for stage in ('detection', 'recognition'):
+        module = getattr(predictor, 'det_predictor' if stage == 'detection' else 'reco_predictor', None)
+        if module is None or not hasattr(module, 'register_forward_pre_hook'):
+            continue
+
+        def start(module, inputs, stage=stage):
+            setattr(timings, stage, time.perf_counter())
+
+        def stop(module, inputs, output, stage=stage):
+            started = getattr(timings, stage, None)
+            if started is not None:
+                OCR_MODEL_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+        module.register_forward_pre_hook(start)
+        module.register_forward_hook(stop)
+    return predictor
+
+
+def render_latest():
+    """Current samples in Prometheus text format, aggregated across processes when configured"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
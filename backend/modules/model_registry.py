@@ -0,0 +1,78 @@
+import time
+import threading
+from .utils import get_rss_mb
+from .embedding_cache import EmbeddingCache
+from .metrics import instrument_ocr_predictor
+
+DEFAULT_SENTENCE_MODEL = 'bert-base-nli-mean-tokens'
+
+
+class ModelRegistry:
+    """Process-wide, lazily initialised cache of OCR and embedding models"""
+
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        self._embedding_caches = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return cached model for key, loading it once with loader on first use"""
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if key not in self._models:
+                rss_before = get_rss_mb()
+                start_time = time.perf_counter()
+                self._models[key] = loader()
+                self._stats[key] = {
+                    'model': ':'.join(str(part) for part in key),
+                    'load_seconds': round(time.perf_counter() - start_time, 3),
+                    'rss_mb': round(get_rss_mb() - rss_before, 1)
+                }
+            return self._models[key]
+
+    def get_ocr_model(self, ocr_config):
+        """Get doctr OCR predictor for the configured architectures"""
+        det_batch_size = ocr_config.get('batch_size', 8)
+        key = ('ocr', ocr_config['det_arch'], ocr_config['reco_arch'], bool(ocr_config['pretrained']), det_batch_size)
+
+        def load():
+            from doctr.models import ocr_predictor
+            return instrument_ocr_predictor(ocr_predictor(
+                det_arch=ocr_config['det_arch'],
+                reco_arch=ocr_config['reco_arch'],
+                pretrained=ocr_config['pretrained'],
+                det_bs=det_batch_size
+            ))
+
+        return self.get(key, load)
+
+    def get_sentence_model(self, model_name=DEFAULT_SENTENCE_MODEL):
+        """Get SentenceTransformer model by name"""
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(model_name)
+
+        return self.get(('sentence', model_name), load)
+
+    def get_embedding_cache(self, model_name=DEFAULT_SENTENCE_MODEL, max_size=50000):
+        """Get the word embedding cache shared by every engine using model_name"""
+        sentence_model = self.get_sentence_model(model_name)
+        with self._lock:
+            if model_name not in self._embedding_caches:
+                self._embedding_caches[model_name] = EmbeddingCache(sentence_model, max_size)
+            return self._embedding_caches[model_name]
+
+    def get_embedding_cache_stats(self):
+        """Get hit/miss counters for each embedding cache"""
+        return {name: cache.get_stats() for name, cache in self._embedding_caches.items()}
+
+    def get_stats(self):
+        """Get load time and resident memory for each loaded model"""
+        return [dict(stats) for stats in self._stats.values()]
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from .metrics import OCR_CACHE_REQUESTS
+
+
+class OCRResultCache:
+    """SQLite-backed cache of OCR results keyed by image content hash plus OCR configuration"""
+
+    def __init__(self, db_path, max_bytes, config_key):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.config_key = config_key
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_access ON ocr_results(last_access)")
+
+    @classmethod
+    def from_config(cls, config):
+        """Create cache from config, or return None when caching is disabled"""
+        cache_config = config.get('cache', {})
+        if not cache_config.get('ocr_results_enabled', True):
+            return None
+
+        ocr_config = config['ocr']
+        # Anything that changes the extracted fields must be part of the key
+        config_key = '|'.join(str(part) for part in (
+            ocr_config['det_arch'],
+            ocr_config['reco_arch'],
+            ocr_config['pretrained'],
+            ocr_config.get('single_pass', True),
+            ocr_config.get('sentence_model', ''),
+            ocr_config.get('max_image_side', 1600)
+        ))
+        return cls(
+            cache_config.get('ocr_results_path', 'output/cache/ocr_results.sqlite'),
+            int(cache_config.get('ocr_results_max_mb', 64) * 1024 * 1024),
+            config_key
+        )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def file_hash(file_path, chunk_size=1024 * 1024):
+        """SHA-256 of file contents"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, image_path):
+        """Cache key for image contents under the current OCR configuration"""
+        return f"{self.file_hash(image_path)}:{self.config_key}"
+
+    def get(self, key, image_path):
+        """Get cached result for key with Image_name set to image_path, or None"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT result FROM ocr_results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"OCR cache read error: {e}")
+            row = None
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        OCR_CACHE_REQUESTS.labels('hit' if row else 'miss').inc()
+
+        if not row:
+            return None
+        result = json.loads(row[0])
+        result['Image_name'] = image_path
+        return result
+
+    def put(self, key, result):
+        """Store result (without its image path) and evict least recently used entries over max size"""
+        payload = json.dumps({field: value for field, value in result.items() if field != 'Image_name'})
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results (key, result, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"OCR cache write error: {e}")
+
+    def _evict(self, conn):
+        total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        stale_keys = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_results ORDER BY last_access ASC"):
+            if total_bytes <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total_bytes -= size
+        conn.executemany("DELETE FROM ocr_results WHERE key = ?", stale_keys)
+
+    def get_stats(self):
+        """Get hit/miss counters for this cache instance"""
+        return {'hits': self.hits, 'misses': self.misses}
@@ -1,30 +1,32 @@
 import re
 import os
-import cv2
 import csv
-import numpy as np
-import pillow_heif
-from PIL import Image
 from dateutil import parser
-from doctr.io import DocumentFile
-from doctr.models import ocr_predictor
-from sentence_transformers import SentenceTransformer, util
 from .utils import load_config
+from .image_loader import ImageLoader
+from .model_registry import model_registry, DEFAULT_SENTENCE_MODEL
+from .ocr_cache import OCRResultCache
+
+# Fixed terms matched against every receipt by identify_meal_type / identify_company
+ANCHOR_TERMS = ['Special', 'Packed', 'M', 'Veg', 'Thali', 'Non veg', 'grazitti', 'intractive']
 
 class OCREngine:
     def __init__(self, config=None):
         self.config = config or load_config()
         self.model = self._load_ocr_model()
-        self.sentence_model = SentenceTransformer('bert-base-nli-mean-tokens')
+        
+        sentence_model_name = self.config['ocr'].get('sentence_model', DEFAULT_SENTENCE_MODEL)
+        self.sentence_model = model_registry.get_sentence_model(sentence_model_name)
+        self.embedding_cache = model_registry.get_embedding_cache(
+            sentence_model_name, self.config['ocr'].get('embedding_cache_size', 50000)
+        )
+        self.anchor_embeddings = self.embedding_cache.encode(ANCHOR_TERMS)
+        self.result_cache = OCRResultCache.from_config(self.config)
+        self.image_loader = ImageLoader(self.config['ocr'].get('max_image_side', 1600))
     
     def _load_ocr_model(self):
-        """Load OCR model with configuration"""
-        ocr_config = self.config['ocr']
-        return ocr_predictor(
-            det_arch=ocr_config['det_arch'],
-            reco_arch=ocr_config['reco_arch'],
-            pretrained=ocr_config['pretrained']
-        )
+        """Load OCR model with configuration (shared across engines in this process)"""
+        return model_registry.get_ocr_model(self.config['ocr'])
     
     def perform_ocr(self, img):
         """Perform OCR on image and return text list"""
@@ -38,70 +40,74 @@ class OCREngine:
                     text_list.append(obj3['value'])
         return text_list
     
-    def divide_image(self, image_path):
-        """Divide image in half and return lower half"""
-        original_image = cv2.imread(image_path)
-        height, width, _ = original_image.shape
-        midpoint_y = height // 2
-        lower_half = original_image[midpoint_y:height, :]
-        return np.asarray(lower_half)
+    def perform_ocr_with_geometry(self, img):
+        """Perform OCR on image and return words with their relative geometry"""
+        result = self.model(img)
+        output = result.export()
+        return self.page_words(output['pages'][0])
     
-    def read_heic(self, file_path):
-        """Read HEIC file and convert to numpy array"""
-        try:
-            import gc
-            from PIL import Image
-            pillow_heif.register_heif_opener()
-            
-            print(f"Processing HEIC: {file_path}")
-            
-            # Force garbage collection before processing
-            gc.collect()
-            
-            with Image.open(file_path) as image:
-                # Aggressively resize to manage memory - smaller size
-                max_size = 1200
-                if image.size[0] > max_size or image.size[1] > max_size:
-                    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                
-                # Convert to RGB with lower quality to save memory
-                rgb_image = image.convert('RGB')
-                
-                # Convert to numpy array
-                result = np.asarray(rgb_image, dtype=np.uint8)
-                
-                # Clear intermediate variables
-                del rgb_image
-                
-            # Force garbage collection after processing
-            gc.collect()
-            print(f"Successfully processed HEIC (size: {result.shape})")
-            return result
-            
-        except (OSError, MemoryError) as e:
-            print(f"Memory/OS error reading HEIC file {file_path}: {e}")
-            import gc
-            gc.collect()
-            return None
-        except Exception as e:
-            print(f"Error reading HEIC file {file_path}: {e}")
-            import gc
-            gc.collect()
-            return None
+    def perform_ocr_batch(self, pages, batch_size=None):
+        """Perform OCR on many pages, one forward pass per batch, returning words per page"""
+        batch_size = batch_size or self.config['ocr'].get('batch_size', 8)
+        
+        words_per_page = []
+        for start in range(0, len(pages), batch_size):
+            result = self.model(pages[start:start + batch_size])
+            output = result.export()
+            words_per_page.extend(self.page_words(page) for page in output['pages'])
+        return words_per_page
+    
+    @staticmethod
+    def page_words(page):
+        """Flatten exported doctr page into a list of word dicts"""
+        words = []
+        for block in page["blocks"]:
+            for line in block["lines"]:
+                words.extend(line["words"])
+        return words
+    
+    @staticmethod
+    def lower_half_words(words, midpoint=0.5):
+        """Return text of words whose vertical centre lies in the lower half of the page"""
+        text_list = []
+        for word in words:
+            # Geometry is relative: ((xmin, ymin), (xmax, ymax)) or a polygon for rotated pages
+            y_coords = [point[1] for point in word['geometry']]
+            if (min(y_coords) + max(y_coords)) / 2 >= midpoint:
+                text_list.append(word['value'])
+        return text_list
+    
+    def load_page(self, image_path):
+        """Decode image file once into a single upright, size-capped page array for the OCR model"""
+        return self.image_loader.load(image_path)
     
     def find_similar_words(self, ocr_output, comparison_word):
         """Find most similar word using sentence transformers"""
-        comparison_embedding = self.sentence_model.encode(comparison_word, convert_to_tensor=True)
-        ocr_embeddings = self.sentence_model.encode(ocr_output, convert_to_tensor=True)
+        if isinstance(ocr_output, str):
+            ocr_output = [ocr_output]
+        
+        comparison_embedding = self.embedding_cache.encode([comparison_word])[0]
+        ocr_embeddings = self.embedding_cache.encode(ocr_output)
         
-        similarities = util.pytorch_cos_sim(comparison_embedding, ocr_embeddings)[0].tolist()
-        max_similarity_index = similarities.index(max(similarities))
+        similarities = ocr_embeddings @ comparison_embedding
+        max_similarity_index = int(similarities.argmax())
         
         most_similar_word = ocr_output[max_similarity_index]
-        similarity_score = similarities[max_similarity_index]
+        similarity_score = float(similarities[max_similarity_index])
         
         return most_similar_word, similarity_score
     
+    def match_anchors(self, text_list):
+        """Best matching OCR word and similarity for every anchor term, from one matrix product"""
+        word_embeddings = self.embedding_cache.encode(text_list)
+        similarities = self.anchor_embeddings @ word_embeddings.T
+        best_indices = similarities.argmax(axis=1)
+        
+        return {
+            anchor: (text_list[best_index], float(similarities[anchor_index, best_index]))
+            for anchor_index, (anchor, best_index) in enumerate(zip(ANCHOR_TERMS, best_indices))
+        }
+    
     def extract_amount(self, input_list):
         """Extract maximum numeric value from text list"""
         numeric_pattern = r"[-+]?\d*\.\d+|\d+"
@@ -140,35 +146,39 @@ class OCREngine:
         
         return None
     
-    def identify_meal_type(self, text_list):
+    def identify_meal_type(self, text_list, anchor_matches=None):
         """Identify meal type from OCR text"""
+        matches = anchor_matches or self.match_anchors(text_list)
+        
         # Check for Special Packed M
-        meal1, conf1 = self.find_similar_words(text_list, 'Special')
-        meal2, conf2 = self.find_similar_words(text_list, 'Packed')
-        meal3, conf3 = self.find_similar_words(text_list, 'M')
+        meal1, conf1 = matches['Special']
+        meal2, conf2 = matches['Packed']
+        meal3, conf3 = matches['M']
         
         if conf1 > 0.90 and conf2 > 0.90 and conf3 > 0.80:
             return 'Special Packed M'
         
         # Check for Special Veg Thali
-        veg, veg_conf = self.find_similar_words(text_list, 'Veg')
-        thali, thali_conf = self.find_similar_words(text_list, 'Thali')
+        veg, veg_conf = matches['Veg']
+        thali, thali_conf = matches['Thali']
         
         if conf1 > 0.90 and veg_conf > 0.90 and thali_conf > 0.80:
             return 'Special Veg Thali'
         
         # Check for Special Non Veg Thali
-        non_veg, non_veg_conf = self.find_similar_words(text_list, 'Non veg')
+        non_veg, non_veg_conf = matches['Non veg']
         
         if conf1 > 0.90 and non_veg_conf > 0.85 and thali_conf > 0.80:
             return 'Special Non Veg Thali'
         
         return ''
     
-    def identify_company(self, text_list):
+    def identify_company(self, text_list, anchor_matches=None):
         """Identify company from OCR text"""
-        com1, conf1 = self.find_similar_words(text_list, 'grazitti')
-        com2, conf2 = self.find_similar_words(text_list, 'intractive')
+        matches = anchor_matches or self.match_anchors(text_list)
+        
+        com1, conf1 = matches['grazitti']
+        com2, conf2 = matches['intractive']
         
         if conf1 > 0.90:
             return 'Grazitti Intractive'
@@ -179,67 +189,148 @@ class OCREngine:
         
         return ''
     
-    def process_image(self, image_path, logger=None):
-        """Process single image and extract all information"""
+    def cache_lookup(self, image_path, logger=None):
+        """Return (cache key, cached result) for image, tolerating unreadable files"""
+        try:
+            cache_key = self.result_cache.make_key(image_path)
+        except OSError as e:
+            if logger:
+                logger.error(f"Error hashing image {image_path}: {e}")
+            return None, None
+        return cache_key, self.result_cache.get(cache_key, image_path)
+    
+    def process_image(self, image_path, logger=None, single_pass=None):
+        """Process single image and extract all information, reusing cached results for unchanged files"""
+        # Explicit mode overrides (e.g. the regression harness) bypass the cache
+        use_cache = self.result_cache is not None and single_pass is None
+        cache_key = None
+        if use_cache:
+            cache_key, cached_result = self.cache_lookup(image_path, logger)
+            if cached_result:
+                return cached_result
+        
+        result = self._process_image(image_path, logger, single_pass)
+        if result and cache_key:
+            self.result_cache.put(cache_key, result)
+        return result
+    
+    def _process_image(self, image_path, logger=None, single_pass=None):
+        if single_pass is None:
+            single_pass = self.config['ocr'].get('single_pass', True)
+        
         try:
             if logger:
                 logger.info(f"Processing image: {image_path}")
             
-            # Handle HEIC format
-            if image_path.lower().endswith('.heic'):
-                image_array = self.read_heic(image_path)
-                if image_array is None:
-                    if logger:
-                        logger.error(f"Failed to read HEIC file: {image_path}")
-                    return None
-                
-                full_text = self.perform_ocr([image_array])
-                
-                height, width, _ = image_array.shape
-                midpoint_y = height // 2
-                half_img = image_array[midpoint_y:height, :]
-                half_text = self.perform_ocr([half_img])
-            else:
-                # Handle other formats
-                img = DocumentFile.from_images(image_path)
-                full_text = self.perform_ocr(img)
-                
-                half_img = self.divide_image(image_path)
-                half_text = self.perform_ocr([half_img])
+            page = self.load_page(image_path)
+            if page is None:
+                if logger:
+                    logger.error(f"Failed to read image: {image_path}")
+                return None
+            pages = [page]
             
-            if logger:
-                logger.info('-------------')
-                logger.info(f"Image path: {image_path}")
-                logger.info(f"OCR result: {half_text}")
+            if single_pass:
+                words = self.perform_ocr_with_geometry(pages)
+                full_text = [word['value'] for word in words]
+                half_text = self.lower_half_words(words)
+            else:
+                full_text = self.perform_ocr(pages)
+                # Lower half is sliced from the already decoded page
+                half_text = self.perform_ocr([page[page.shape[0] // 2:, :]])
             
-            # Extract information
-            date = self.extract_date(full_text)
-            emp_code = self.extract_emp_code(full_text)
-            amount = self.extract_amount(half_text)
-            company = self.identify_company(full_text)
-            meal = self.identify_meal_type(full_text)
+            return self.extract_fields(full_text, half_text, image_path, logger)
             
+        except Exception as e:
             if logger:
-                logger.info(f"Date: {date}")
-                logger.info(f"EMP Code: {emp_code}")
-                logger.info(f"Company: {company}")
-                logger.info(f"Meal: {meal}")
-                logger.info(f"Amount: {amount}")
-                logger.info(full_text)
-            
-            return {
-                'Date': date,
-                'Code': emp_code,
-                'Amount': amount,
-                'Company': company,
-                'Meal': meal,
-                'Image_name': image_path
-            }
-            
+                logger.error(f"Error processing image {image_path}: {e}")
+            return None
+    
+    def process_images_batch(self, image_paths, batch_size=None, logger=None):
+        """Process many images with batched OCR; results are aligned with image_paths"""
+        if not self.config['ocr'].get('single_pass', True):
+            # Two-pass mode needs a second OCR run per image, so batching does not apply
+            return [self.process_image(image_path, logger) for image_path in image_paths]
+        
+        results = [None] * len(image_paths)
+        cache_keys = [None] * len(image_paths)
+        pages, page_indices = [], []
+        
+        for index, image_path in enumerate(image_paths):
+            if self.result_cache is not None:
+                cache_keys[index], results[index] = self.cache_lookup(image_path, logger)
+                if results[index]:
+                    continue
+            page = self.load_page(image_path)
+            if page is not None:
+                pages.append(page)
+                page_indices.append(index)
+        
+        if not pages:
+            return results
+        
+        words_per_page = self.perform_ocr_batch(pages, batch_size)
+        del pages
+        
+        for index, words in zip(page_indices, words_per_page):
+            results[index] = self.result_from_words(words, image_paths[index], cache_keys[index], logger)
+        
+        return results
+    
+    def result_from_words(self, words, image_path, cache_key=None, logger=None):
+        """Extract fields from single-pass OCR words and store them under cache_key"""
+        try:
+            full_text = [word['value'] for word in words]
+            result = self.extract_fields(full_text, self.lower_half_words(words), image_path, logger)
         except Exception as e:
             if logger:
                 logger.error(f"Error processing image {image_path}: {e}")
             return None
+        
+        if cache_key:
+            self.result_cache.put(cache_key, result)
+        return result
+    
+    def extract_fields(self, full_text, half_text, image_path, logger=None):
+        """Extract receipt fields from full page and lower half OCR text"""
+        if logger:
+            logger.info('-------------')
+            logger.info(f"Image path: {image_path}")
+            logger.info(f"OCR result: {half_text}")
+        
+        # Extract information
+        date = self.extract_date(full_text)
+        emp_code = self.extract_emp_code(full_text)
+        amount = self.extract_amount(half_text)
+        
+        # Encode the receipt words once and score every anchor term together
+        anchor_matches = self.match_anchors(full_text)
+        company = self.identify_company(full_text, anchor_matches)
+        meal = self.identify_meal_type(full_text, anchor_matches)
+        
+        if logger:
+            logger.info(f"Date: {date}")
+            logger.info(f"EMP Code: {emp_code}")
+            logger.info(f"Company: {company}")
+            logger.info(f"Meal: {meal}")
+            logger.info(f"Amount: {amount}")
+            logger.info(full_text)
+        
+        return {
+            'Date': date,
+            'Code': emp_code,
+            'Amount': amount,
+            'Company': company,
+            'Meal': meal,
+            'Image_name': image_path
+        }
+    
+    def get_decode_stats(self):
+        """Get image decode timings and memory high-water marks for this engine"""
+        return self.image_loader.get_stats()
+    
+    def get_cache_stats(self):
+        """Get OCR result cache hits and misses for this engine"""
+        return self.result_cache.get_stats() if self.result_cache else {'hits': 0, 'misses': 0}
     
     def save_to_csv(self, data_dict, file_path):
         """Save dictionary to CSV file"""
@@ -0,0 +1,136 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from .metrics import PIPELINE_STAGE_SECONDS
+
+# Engine owned by this worker process, created once by _init_worker
+_worker_engine = None
+
+# Thread-count variables read by torch/MKL/OpenMP when they are first imported
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def available_cores():
+    """CPU cores this process may run on (respects affinity/cgroup pinning where exposed)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_process_count(torch_threads=1):
+    """One worker per torch_threads cores, so workers x intra-op threads never exceeds the cores"""
+    return max(1, available_cores() // max(1, torch_threads))
+
+
+def _init_worker(config, torch_threads):
+    """Pin torch threads and load the models once for this worker process"""
+    global _worker_engine
+
+    # Must happen before torch is imported in this (freshly spawned) process
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(torch_threads)
+
+    import torch
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already set once parallel work has started in this process
+        pass
+
+    from .ocr_engine import OCREngine
+    _worker_engine = OCREngine(config)
+
+
+def _process_batch(items, batch_size):
+    """OCR (image_path, cache_key) items in the worker; results are aligned with items"""
+    engine = _worker_engine
+    if not engine.config['ocr'].get('single_pass', True):
+        results = []
+        for image_path, cache_key in items:
+            result = engine.process_image(image_path, single_pass=False)
+            if result and cache_key:
+                engine.result_cache.put(cache_key, result)
+            results.append(result)
+        return results
+
+    results = [None] * len(items)
+    pages, page_indices = [], []
+    for index, (image_path, _) in enumerate(items):
+        with PIPELINE_STAGE_SECONDS.labels('decode').time():
+            page = engine.load_page(image_path)
+        if page is not None:
+            pages.append(page)
+            page_indices.append(index)
+
+    if not pages:
+        return results
+
+    with PIPELINE_STAGE_SECONDS.labels('ocr_batch').time():
+        words_per_page = engine.perform_ocr_batch(pages, batch_size)
+    del pages
+
+    with PIPELINE_STAGE_SECONDS.labels('extract').time():
+        for index, words in zip(page_indices, words_per_page):
+            image_path, cache_key = items[index]
+            results[index] = engine.result_from_words(words, image_path, cache_key)
+    return results
+
+
+def _warm_up_worker(image_path):
+    """Run one image through this worker's models (the first forward pass is slow); returns the pid"""
+    if image_path:
+        _process_batch([(image_path, None)], 1)
+    return os.getpid()
+
+
+class OCRProcessPool:
+    """OCR worker processes, each with its own models and a pinned torch thread count"""
+
+    def __init__(self, config, processes=None, torch_threads=None):
+        pipeline_config = config.get('pipeline', {})
+        self.torch_threads = max(1, torch_threads or pipeline_config.get('torch_threads', 1))
+        self.processes = processes or pipeline_config.get('ocr_processes') or default_process_count(self.torch_threads)
+        self.batch_size = config['ocr'].get('batch_size', 8)
+
+        # spawn rather than fork: forking a process that already holds torch/BLAS thread pools can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(config, self.torch_threads)
+        )
+
+    def submit(self, items):
+        """Queue a batch of (image_path, cache_key) items; the future yields one result per item"""
+        return self._executor.submit(_process_batch, list(items), self.batch_size)
+
+    def process_paths(self, image_paths):
+        """OCR image paths across all workers (no cache keys), returning results in input order"""
+        futures = [
+            self.submit((image_path, None) for image_path in image_paths[start:start + self.batch_size])
+            for start in range(0, len(image_paths), self.batch_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def warm_up(self, image_path=None):
+        """Start every worker process and wait until each has loaded its models"""
+        # Workers are spawned as tasks arrive and one that is already warm can take several
+        # warm-up tasks, so repeat until every worker has answered at least once
+        ready = set()
+        while len(ready) < self.processes:
+            futures = [self._executor.submit(_warm_up_worker, image_path) for _ in range(self.processes)]
+            ready.update(future.result() for future in futures)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(cancel_futures=exc_type is not None)
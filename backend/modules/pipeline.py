@@ -0,0 +1,286 @@
+import queue
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from .ocr_pool import OCRProcessPool
+from .metrics import PIPELINE_STAGE_SECONDS
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StreamingOCRPipeline:
+    """Decode -> OCR -> CSV append stages fed by a producer, connected by bounded queues"""
+
+    def __init__(self, ocr_engine, csv_output_path, config, progress_callback=None):
+        self.ocr_engine = ocr_engine
+        self.csv_output_path = csv_output_path
+        self.config = config
+        self.progress_callback = progress_callback
+
+        pipeline_config = config.get('pipeline', {})
+        queue_size = pipeline_config.get('queue_size', 32)
+        self.decode_workers = max(1, pipeline_config.get('decode_workers', 2))
+        self.batch_wait_seconds = pipeline_config.get('batch_wait_seconds', 0.2)
+        self.batch_size = config['ocr'].get('batch_size', 8)
+        self.single_pass = config['ocr'].get('single_pass', True)
+        self.extensions = tuple(ext.lower() for ext in config['ocr']['supported_formats'])
+        # 'process' runs decode + OCR in worker processes instead of on this process's shared engine
+        self.ocr_executor = pipeline_config.get('ocr_executor', 'thread')
+        self.ocr_pool = None
+
+        self.decode_queue = queue.Queue(maxsize=queue_size)
+        self.ocr_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+
+        self.stats = {'queued': 0, 'decoded': 0, 'cached': 0, 'ocr_done': 0, 'written': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        # Set when the producer fails, the job is cancelled or a stage breaks; stages then drain without working
+        self._stop = threading.Event()
+        # First stage-level failure (e.g. a broken OCR worker pool); run() raises it
+        self._error = None
+
+    def _count(self, counter, amount=1):
+        with self._stats_lock:
+            self.stats[counter] += amount
+            snapshot = dict(self.stats)
+        if self.progress_callback:
+            self.progress_callback(snapshot)
+
+    def _abort(self, message, failed=0):
+        """Stop every stage after a failure they cannot recover from; run() re-raises it"""
+        print(message)
+        with self._stats_lock:
+            if self._error is None:
+                self._error = message
+        if failed:
+            self._count('failed', failed)
+        self._stop.set()
+
+    def _discard(self, count=1):
+        # Items drained after a stage broke never get a result, so they count as failed;
+        # after a cancellation nobody reads the counts
+        if self._error is not None:
+            self._count('failed', count)
+
+    def submit(self, file_path):
+        """Queue a downloaded file; blocks while the decode stage is full (backpressure)"""
+        if self._error is not None:
+            # Stop the producer instead of downloading into a pipeline that cannot finish
+            raise RuntimeError(self._error)
+        if not file_path.lower().endswith(self.extensions):
+            return
+        self._count('queued')
+        self.decode_queue.put(file_path)
+
+    def _decode_stage(self):
+        while True:
+            image_path = self.decode_queue.get()
+            if image_path is _DONE:
+                self.ocr_queue.put(_DONE)
+                return
+            if self._stop.is_set():
+                self._discard()
+                continue
+
+            try:
+                cache_key = None
+                if self.ocr_engine.result_cache is not None:
+                    cache_key, cached_result = self.ocr_engine.cache_lookup(image_path)
+                    if cached_result:
+                        self._count('cached')
+                        self.write_queue.put(cached_result)
+                        continue
+
+                # Two-pass mode and worker processes read the file themselves, so only
+                # single-pass pages for the in-process OCR stage are decoded here
+                decode_here = self.single_pass and self.ocr_pool is None
+                page = None
+                if decode_here:
+                    with PIPELINE_STAGE_SECONDS.labels('decode').time():
+                        page = self.ocr_engine.load_page(image_path)
+                if decode_here and page is None:
+                    self._count('failed')
+                    continue
+                self._count('decoded')
+                self.ocr_queue.put((image_path, page, cache_key))
+            except Exception as e:
+                print(f"Error decoding {image_path}: {e}")
+                self._count('failed')
+
+    def _next_ocr_batch(self, pending_done, first_timeout=None):
+        """Wait for one item, then gather up to batch_size without waiting long for stragglers"""
+        batch = []
+        while len(batch) < self.batch_size and pending_done[0] > 0:
+            try:
+                timeout = first_timeout if not batch else self.batch_wait_seconds
+                item = self.ocr_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                pending_done[0] -= 1
+                continue
+            batch.append(item)
+        return batch
+
+    def _ocr_batch(self, batch):
+        """OCR one batch in this process; None marks an item that produced no result"""
+        if not self.single_pass:
+            results = []
+            for image_path, _, cache_key in batch:
+                with PIPELINE_STAGE_SECONDS.labels('ocr_two_pass').time():
+                    result = self.ocr_engine.process_image(image_path, single_pass=False)
+                if result and cache_key:
+                    self.ocr_engine.result_cache.put(cache_key, result)
+                results.append(result)
+            return results
+
+        try:
+            with PIPELINE_STAGE_SECONDS.labels('ocr_batch').time():
+                words_per_page = self.ocr_engine.perform_ocr_batch([page for _, page, _ in batch], self.batch_size)
+        except Exception as e:
+            print(f"Error running OCR batch: {e}")
+            return [None] * len(batch)
+        with PIPELINE_STAGE_SECONDS.labels('extract').time():
+            return [
+                self.ocr_engine.result_from_words(words, image_path, cache_key)
+                for (image_path, _, cache_key), words in zip(batch, words_per_page)
+            ]
+
+    def _ocr_stage(self):
+        # One end marker is expected from each decode worker
+        pending_done = [self.decode_workers]
+
+        # The writer must always get its end marker, or run() never returns
+        try:
+            while pending_done[0] > 0:
+                batch = self._next_ocr_batch(pending_done)
+                if not batch:
+                    continue
+                if self._stop.is_set():
+                    self._discard(len(batch))
+                    continue
+
+                try:
+                    results = self._ocr_batch(batch)
+                except Exception as e:
+                    # Keep draining ocr_queue so the decode workers are not left blocked on it
+                    self._abort(f"Error in OCR stage: {e}", len(batch))
+                    continue
+                self._emit(results)
+        finally:
+            self.write_queue.put(_DONE)
+
+    def _emit(self, results):
+        for result in results:
+            if result:
+                self._count('ocr_done')
+                self.write_queue.put(result)
+            else:
+                self._count('failed')
+
+    def _collect(self, futures, batch_sizes):
+        for future in futures:
+            batch_size = batch_sizes.pop(future)
+            try:
+                results = future.result()
+            except BrokenProcessPool as e:
+                # Every later batch would fail the same way
+                self._abort(f"OCR worker pool failed: {e}", batch_size)
+                continue
+            except Exception as e:
+                print(f"Error running OCR batch in worker process: {e}")
+                self._count('failed', batch_size)
+                continue
+            self._emit(results)
+
+    def _pool_ocr_stage(self):
+        pending_done = [self.decode_workers]
+        batch_sizes = {}
+        # One batch running and one queued per worker process keeps them all busy
+        max_in_flight = self.ocr_pool.processes * 2
+
+        # The writer must always get its end marker, or run() never returns
+        try:
+            while pending_done[0] > 0:
+                # Poll while batches are in flight so finished results reach the writer promptly
+                first_timeout = self.batch_wait_seconds if batch_sizes else None
+                batch = self._next_ocr_batch(pending_done, first_timeout)
+                if batch and self._stop.is_set():
+                    self._discard(len(batch))
+                    batch = []
+
+                unsubmitted = len(batch)
+                try:
+                    if batch:
+                        future = self.ocr_pool.submit((image_path, cache_key) for image_path, _, cache_key in batch)
+                        batch_sizes[future] = len(batch)
+                        unsubmitted = 0
+
+                    finished = [future for future in batch_sizes if future.done()]
+                    if len(batch_sizes) - len(finished) >= max_in_flight:
+                        finished, _ = wait(list(batch_sizes), return_when=FIRST_COMPLETED)
+                    self._collect(finished, batch_sizes)
+                except Exception as e:
+                    # BrokenProcessPool after a worker was killed or failed to load its models;
+                    # batches already in flight fail through their futures in _collect
+                    self._abort(f"OCR worker pool failed: {e}", unsubmitted)
+
+            if batch_sizes:
+                done, _ = wait(list(batch_sizes))
+                self._collect(done, batch_sizes)
+        finally:
+            self.write_queue.put(_DONE)
+
+    def _write_stage(self):
+        while True:
+            result = self.write_queue.get()
+            if result is _DONE:
+                return
+            if self._stop.is_set():
+                self._discard()
+                continue
+            try:
+                with PIPELINE_STAGE_SECONDS.labels('write').time():
+                    self.ocr_engine.save_to_csv(result, self.csv_output_path)
+                self._count('written')
+            except Exception as e:
+                print(f"Error writing result for {result.get('Image_name')}: {e}")
+                self._count('failed')
+
+    def run(self, produce):
+        """Run produce(submit) in the calling thread while the stages drain its output"""
+        if self.ocr_executor == 'process':
+            self.ocr_pool = OCRProcessPool(self.config)
+
+        threads = [
+            threading.Thread(target=self._decode_stage, name=f"pipeline-decode-{index}", daemon=True)
+            for index in range(self.decode_workers)
+        ]
+        ocr_stage = self._pool_ocr_stage if self.ocr_pool else self._ocr_stage
+        threads.append(threading.Thread(target=ocr_stage, name="pipeline-ocr", daemon=True))
+        threads.append(threading.Thread(target=self._write_stage, name="pipeline-write", daemon=True))
+
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            produce_result = produce(self.submit)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for _ in range(self.decode_workers):
+                self.decode_queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+            if self.ocr_pool:
+                self.ocr_pool.shutdown(cancel_futures=True)
+                self.ocr_pool = None
+
+        if self._error is not None:
+            raise RuntimeError(self._error)
+        self.stats['elapsed_seconds'] = round(time.perf_counter() - start_time, 2)
+        return produce_result
@@ -1,15 +1,44 @@
 import os
+import difflib
 import pandas as pd
 import numpy as np
 import gspread
 from dateutil import parser as date_parser
 from oauth2client.service_account import ServiceAccountCredentials
 from .utils import load_config
+from .model_registry import model_registry, DEFAULT_SENTENCE_MODEL
+from .metrics import sheets_call
+
+# Day zero of Sheets date serial numbers
+SHEETS_EPOCH = pd.Timestamp('1899-12-30')
+# Letters OCR commonly reads in place of digits in employee codes
+OCR_CONFUSIONS = str.maketrans('OILSB', '01158')
+# difflib ratios on normalised codes: at or above NEAR_MATCH_RATIO is the same code with at
+# most one edit in 20+ characters, below DISTINCT_RATIO the codes share under half their characters
+NEAR_MATCH_RATIO = 0.95
+DISTINCT_RATIO = 0.5
+
+class _InstrumentedWorksheet:
+    """Worksheet proxy recording latency and outcome of every Sheets API call"""
+    
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._worksheet, name)
+        if not callable(attribute):
+            return attribute
+        
+        def call(*args, **kwargs):
+            with sheets_call(name):
+                return attribute(*args, **kwargs)
+        return call
 
 class PostProcessor:
-    def __init__(self, config=None):
+    def __init__(self, config=None, gc=None):
         self.config = config or load_config()
-        self.gc = self._authenticate_gspread()
+        # Any object with gspread's open(title).worksheet(title) interface works
+        self.gc = gc or self._authenticate_gspread()
     
     def _authenticate_gspread(self):
         """Authenticate with Google Sheets"""
@@ -21,17 +50,19 @@ class PostProcessor:
     def open_google_sheet(self, spreadsheet_title, worksheet_title):
         """Open Google Sheet and worksheet"""
         try:
-            spreadsheet = self.gc.open(spreadsheet_title)
-            worksheet = spreadsheet.worksheet(worksheet_title)
-            return worksheet
+            with sheets_call('open'):
+                spreadsheet = self.gc.open(spreadsheet_title)
+                worksheet = spreadsheet.worksheet(worksheet_title)
+            return _InstrumentedWorksheet(worksheet)
         except gspread.exceptions.SpreadsheetNotFound:
             print(f"Spreadsheet '{spreadsheet_title}' not found.")
             return None
         except gspread.exceptions.WorksheetNotFound:
             print(f"Worksheet '{worksheet_title}' not found. Creating new worksheet.")
-            spreadsheet = self.gc.open(spreadsheet_title)
-            worksheet = spreadsheet.add_worksheet(title=worksheet_title, rows=1, cols=1)
-            return worksheet
+            with sheets_call('add_worksheet'):
+                spreadsheet = self.gc.open(spreadsheet_title)
+                worksheet = spreadsheet.add_worksheet(title=worksheet_title, rows=1, cols=1)
+            return _InstrumentedWorksheet(worksheet)
     
     def read_sheet(self):
         """Read data from Quark City Emp Id - Grazitti Data sheet"""
@@ -115,6 +146,105 @@ class PostProcessor:
         except Exception as e:
             print(f"Error pushing data: {e}")
 
+    @staticmethod
+    def _normalise_key_value(column, value):
+        """Normalise an unformatted sheet cell or a DataFrame value so equal keys compare equal"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if column == 'Date':
+                # Date cells are read as serial day numbers, independent of the sheet's locale
+                return (SHEETS_EPOCH + pd.to_timedelta(value, unit='D')).strftime('%Y-%m-%d')
+            value = int(value) if float(value).is_integer() else value
+        value = '' if value is None else str(value).strip()
+        if column == 'Date' and value:
+            # Only ISO dates (what the pipeline writes) are parsed; guessing day/month order
+            # on display strings would match the wrong rows
+            parsed = pd.to_datetime(value, format='ISO8601', errors='coerce')
+            if pd.notna(parsed):
+                return parsed.strftime('%Y-%m-%d')
+        return value
+    
+    def _read_key_index(self, worksheet, key_columns):
+        """Read the header and key columns only, returning (header, {key: sheet row number})"""
+        header = worksheet.row_values(1)
+        if not header or any(column not in header for column in key_columns):
+            return header, {}
+        
+        column_letters = [
+            gspread.utils.rowcol_to_a1(1, header.index(column) + 1).rstrip('0123456789')
+            for column in key_columns
+        ]
+        key_ranges = worksheet.batch_get(
+            [f"{letter}2:{letter}" for letter in column_letters],
+            value_render_option='UNFORMATTED_VALUE',
+            date_time_render_option='SERIAL_NUMBER'
+        )
+        
+        # Blank cells come back as empty rows and trailing blanks are omitted
+        columns = [[cells[0] if cells else '' for cells in value_range] for value_range in key_ranges]
+        row_count = max((len(column) for column in columns), default=0)
+        columns = [column + [''] * (row_count - len(column)) for column in columns]
+        
+        key_index = {}
+        for offset, values in enumerate(zip(*columns)):
+            key = tuple(self._normalise_key_value(column, value) for column, value in zip(key_columns, values))
+            key_index[key] = offset + 2  # Later duplicates win, as with keep='last'
+        return header, key_index
+    
+    def upsert_to_sheet(self, df, spreadsheet_title, worksheet_title, key_columns=('Date', 'UserID'), worksheet=None):
+        """Append rows with new keys and update rows whose key already exists, without rewriting the sheet"""
+        key_columns = list(key_columns)
+        worksheet = worksheet or self.open_google_sheet(spreadsheet_title, worksheet_title)
+        
+        df = df.drop_duplicates(subset=key_columns, keep='last')
+        df_columns = df.columns.tolist()
+        df_data = df.astype(str).values.tolist()
+        
+        header, key_index = self._read_key_index(worksheet, key_columns)
+        
+        if not header:
+            worksheet.append_rows([df_columns] + df_data, value_input_option='USER_ENTERED')
+            return {'appended': len(df_data), 'updated': 0}
+        
+        if header != df_columns:
+            print("Headers mismatched. Falling back to a full deduplicated rewrite.")
+            return self._rewrite_deduplicated(worksheet, df, key_columns)
+        
+        key_positions = [df_columns.index(column) for column in key_columns]
+        last_column = gspread.utils.rowcol_to_a1(1, len(df_columns)).rstrip('0123456789')
+        
+        appends = []
+        updates = []
+        for row in df_data:
+            key = tuple(self._normalise_key_value(column, row[position])
+                        for column, position in zip(key_columns, key_positions))
+            row_number = key_index.get(key)
+            if row_number is None:
+                appends.append(row)
+            else:
+                updates.append({'range': f"A{row_number}:{last_column}{row_number}", 'values': [row]})
+        
+        if updates:
+            worksheet.batch_update(updates, value_input_option='USER_ENTERED')
+        if appends:
+            worksheet.append_rows(appends, value_input_option='USER_ENTERED')
+        
+        print(f"Upsert complete: {len(appends)} appended, {len(updates)} updated.")
+        return {'appended': len(appends), 'updated': len(updates)}
+    
+    def _rewrite_deduplicated(self, worksheet, df, key_columns):
+        """Merge df into the existing rows, drop duplicate keys and rewrite the whole sheet"""
+        existing_values = worksheet.get_all_values()
+        existing_df = pd.DataFrame(existing_values[1:], columns=existing_values[0]) if existing_values else pd.DataFrame()
+        
+        combined = pd.concat([existing_df, df.astype(str)], ignore_index=True).fillna('')
+        combined = self.remove_duplicates(combined, key_columns)
+        
+        worksheet.clear()
+        worksheet.append_rows(
+            [combined.columns.tolist()] + combined.astype(str).values.tolist(),
+            value_input_option='USER_ENTERED'
+        )
+        return {'appended': len(combined), 'updated': 0, 'rewritten': True}
     
     def fill_missing_amount_with_mode(self, df):
         """Fill missing amounts with mode values based on meal type"""
@@ -212,12 +342,57 @@ class PostProcessor:
             print(f"Error in extract_month_year: {e}")
             return df
     
-    def process_employee_matching(self, df, emp_data_df, current_month_year):
-        """Process employee code matching with database"""
-        from .ocr_engine import OCREngine
+    @staticmethod
+    def _normalise_code(code):
+        """Upper-case a code, drop spaces and dashes, and undo common OCR letter/digit confusions"""
+        return code.upper().replace(' ', '').replace('-', '').translate(OCR_CONFUSIONS)
+    
+    def code_similarity(self, codes, emp_ids):
+        """Similarity between OCR employee codes and Employee Data IDs, aligned on the input index"""
+        codes = codes.astype(str)
+        emp_ids = emp_ids.astype(str)
+        similarity = pd.Series(np.nan, index=codes.index, dtype=float)
+        
+        # Fast path: the sentence model's tokenizer is uncased and ignores surrounding
+        # whitespace, so pairs that only differ in those embed identically (similarity 1.0)
+        exact = codes.str.strip().str.lower() == emp_ids.str.strip().str.lower()
+        similarity[exact] = 1.0
         
-        ocr_engine = OCREngine(self.config)
+        # Edit-distance fast path on the rest: near matches count as matches, clearly
+        # different codes as mismatches (kept below similarity_threshold), and only the
+        # ambiguous middle band is sent to the sentence model
+        remaining = ~exact
+        if remaining.any():
+            ratios = pd.Series([
+                difflib.SequenceMatcher(None, self._normalise_code(code), self._normalise_code(emp_id)).ratio()
+                for code, emp_id in zip(codes[remaining], emp_ids[remaining])
+            ], index=codes[remaining].index)
+            near_match = ratios >= NEAR_MATCH_RATIO
+            distinct = ratios < min(DISTINCT_RATIO, self.config['processing']['similarity_threshold'])
+            similarity[ratios.index[near_match]] = 1.0
+            similarity[ratios.index[distinct]] = ratios[distinct]
+            remaining = similarity.isna()
         
+        if remaining.any():
+            ocr_config = self.config['ocr']
+            embedding_cache = model_registry.get_embedding_cache(
+                ocr_config.get('sentence_model', DEFAULT_SENTENCE_MODEL),
+                ocr_config.get('embedding_cache_size', 50000)
+            )
+            
+            # Encode each distinct code/ID once, then take row-wise dot products of unit vectors
+            unique_values = pd.unique(pd.concat([codes[remaining], emp_ids[remaining]]))
+            embeddings = embedding_cache.encode(list(unique_values))
+            positions = {value: position for position, value in enumerate(unique_values)}
+            
+            code_embeddings = embeddings[codes[remaining].map(positions).to_numpy()]
+            emp_id_embeddings = embeddings[emp_ids[remaining].map(positions).to_numpy()]
+            similarity[remaining] = np.einsum('ij,ij->i', code_embeddings, emp_id_embeddings)
+        
+        return similarity
+    
+    def process_employee_matching(self, df, emp_data_df, current_month_year):
+        """Process employee code matching with database"""
         # Try the extraction - pattern: images\username\October 2025
         df["UserID"] = df['Image_name'].str.extract(r'images[/\\]([^/\\]+)[/\\]')
         merged_df = pd.merge(df, emp_data_df, on='UserID', how='left')
@@ -231,39 +406,42 @@ class PostProcessor:
         merged_df["Comment"] = None
         merged_df["Category"] = None
         
-        # Process each row for matching
-        for index, row in merged_df.iterrows():
-            # Check if we have valid meal data
-            meal_type = row.get("Meal type", None) if "Meal type" in merged_df.columns else None
-            
-            if pd.isna(meal_type):
-                merged_df.loc[index, "Comment"] = "Not a Meal"
-                merged_df.loc[index, "Category"] = 2
-            
-            elif pd.notna(row.get('Code')) and pd.notna(row.get('Emp ID')):
-                _, similarity = ocr_engine.find_similar_words(row['Code'], row['Emp ID'])
-                # print(f"id1= {row['Code']}  id2 = {row['Emp ID']}  similarity = {similarity} ")
-                
-                if similarity > self.config['processing']['similarity_threshold']:
-                    merged_df.loc[index, "Comment"] = ""
-                    merged_df.loc[index, "Category"] = 1
-                    
-                elif similarity < self.config['processing']['similarity_threshold']:
-                    merged_df.loc[index, "Comment"] = "Not Eligible (Employee code mismatched)"
-                    merged_df.loc[index, "Eligible for Reimbursement"] = "No"
-                    merged_df.loc[index, "Reimbursement Amount"] = 0
-                    merged_df.loc[index, "Category"] = 4
-                    
-            elif pd.isna(row.get('Code')):
-                merged_df.loc[index, 'Code'] = row['Emp ID']
-                merged_df.loc[index, "Comment"] = "Employee code not found from Slip (Code replaced from Employee Data sheet)"
-                merged_df.loc[index, "Category"] = 3
-                
-            elif pd.isna(row.get('Emp ID')):
-                merged_df.loc[index, "Comment"] = "Emp ID not Found Please update Employee Data."
-                
-            else:
-                print("error")
+        missing = pd.Series(None, index=merged_df.index, dtype=object)
+        meal_type = merged_df["Meal type"] if "Meal type" in merged_df.columns else missing
+        code = merged_df["Code"] if "Code" in merged_df.columns else missing
+        emp_id = merged_df["Emp ID"] if "Emp ID" in merged_df.columns else missing
+        
+        # Same precedence as the row-wise rules: missing meal, then code comparison,
+        # then missing code, then missing Emp ID
+        not_a_meal = meal_type.isna()
+        is_meal = ~not_a_meal
+        compare = is_meal & code.notna() & emp_id.notna()
+        code_missing = is_meal & code.isna()
+        emp_id_missing = is_meal & code.notna() & emp_id.isna()
+        
+        threshold = self.config['processing']['similarity_threshold']
+        similarity = pd.Series(np.nan, index=merged_df.index, dtype=float)
+        if compare.any():
+            similarity[compare] = self.code_similarity(code[compare], emp_id[compare])
+        matched = compare & (similarity > threshold)
+        mismatched = compare & (similarity < threshold)
+        
+        merged_df.loc[not_a_meal, "Comment"] = "Not a Meal"
+        merged_df.loc[not_a_meal, "Category"] = 2
+        
+        merged_df.loc[matched, "Comment"] = ""
+        merged_df.loc[matched, "Category"] = 1
+        
+        merged_df.loc[mismatched, "Comment"] = "Not Eligible (Employee code mismatched)"
+        merged_df.loc[mismatched, "Eligible for Reimbursement"] = "No"
+        merged_df.loc[mismatched, "Reimbursement Amount"] = 0
+        merged_df.loc[mismatched, "Category"] = 4
+        
+        merged_df.loc[code_missing, "Code"] = emp_id[code_missing]
+        merged_df.loc[code_missing, "Comment"] = "Employee code not found from Slip (Code replaced from Employee Data sheet)"
+        merged_df.loc[code_missing, "Category"] = 3
+        
+        merged_df.loc[emp_id_missing, "Comment"] = "Emp ID not Found Please update Employee Data."
         
         return merged_df
     
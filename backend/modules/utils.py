@@ -1,4 +1,5 @@
 import os
+import sys
 import logging
 import yaml
 from datetime import datetime
@@ -33,6 +34,18 @@ def setup_logger(config=None):
     logger.addHandler(handler)
     return logger
 
+def get_rss_mb():
+    """Get resident memory of the current process in MB"""
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak RSS is the closest portable fallback (KB on Linux, bytes on macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
 def ensure_directory_exists(directory_path):
     """Create directory if it doesn't exist"""
     if not os.path.exists(directory_path):
@@ -0,0 +1,65 @@
+import os
+import zipfile
+
+
+# Having no tell/seek makes ZipFile write in streaming mode: sizes and CRCs go in
+# data descriptors after each entry instead of being patched into the headers later
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _unique_arcname(file_path, used_names):
+    """Base name of file_path, with ' (2)', ' (3)', ... before the extension on repeats"""
+    arcname = os.path.basename(file_path)
+    stem, extension = os.path.splitext(arcname)
+    copy_number = 1
+    while arcname in used_names:
+        copy_number += 1
+        arcname = f"{stem} ({copy_number}){extension}"
+    used_names.add(arcname)
+    return arcname
+
+
+def stream_zip(file_paths, chunk_size=1024 * 1024):
+    """Yield a ZIP of file_paths (stored, not recompressed) while reading them chunk by chunk"""
+    sink = _ChunkSink()
+    used_names = set()
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zip_file:
+        for file_path in file_paths:
+            if not os.path.isfile(file_path):
+                continue
+
+            # Receipts from different employees often share a name (IMG_1234.jpg), so
+            # repeats are renamed rather than dropped
+            arcname = _unique_arcname(file_path, used_names)
+
+            # Receipts are already-compressed JPEG/HEIC, so deflating them only costs CPU
+            zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+            zip_info.compress_type = zipfile.ZIP_STORED
+
+            with open(file_path, 'rb') as source, zip_file.open(zip_info, 'w') as entry:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+
+    # Central directory is written on close
+    yield sink.drain()
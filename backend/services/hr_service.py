@@ -1,116 +1,267 @@
 import sys
 import os
+import time
+import asyncio
+import threading
 import pandas as pd
-import zipfile
-import tempfile
 
 from modules.post_processing import PostProcessor
 from modules.utils import load_config
 from modules.gdrive_downloader import GDriveDownloader
 from modules.ocr_engine import OCREngine
-from modules.utils import list_files_recursive
+from modules.model_registry import model_registry
+from modules.pipeline import StreamingOCRPipeline
+from modules.archive_cache import ArchiveCache, ArchiveSnapshot
+from modules.archive_aggregates import MonthAggregateStore, build_month_aggregates
+from modules.archive_mirror import ArchiveMirror
+from modules.job_store import JobCancelled
+from modules.zip_stream import stream_zip
+from modules.export_stream import check_export_format, stream_export
+from modules.metrics import StageTimer
+from modules.async_sheets import AsyncSheetsClient, SingleFlight
 
 class HRService:
-    def __init__(self):
+    def __init__(self, config=None, processor=None, drive=None, sheets_api=None):
         self.backend_dir = os.path.dirname(__file__)
         self.original_dir = os.getcwd()
         
         config_path = os.path.join(self.backend_dir, '../config/config.yaml')
-        self.config = load_config(config_path)
-        self.processor = PostProcessor(self.config)
+        self.config = config or load_config(config_path)
+        # processor/drive let offline harnesses swap in Sheets and Drive stand-ins
+        self.processor = processor or PostProcessor(self.config)
+        self.drive = drive
+        # Non-blocking Sheets reads for the async dashboard endpoints
+        self.sheets_api = sheets_api or AsyncSheetsClient(self.config)
+        self._reconcile_flight = SingleFlight()
+        # Wall-clock time before which the async dashboard path skips the mirror's reconcile check
+        self._reconcile_due_at = 0.0
         self.spreadsheet_title = self.config['gsheets']['spreadsheet_title']
         self.archive_sheet = self.config['gsheets']['archive_sheet']
+        
+        cache_config = self.config.get('cache', {})
+        self.archive_cache = ArchiveCache(
+            self._load_archive,
+            ttl_seconds=cache_config.get('archive_ttl_seconds', 300),
+            version_path=cache_config.get('archive_version_path', 'output/cache/archive.version')
+        )
+        self.month_aggregates = MonthAggregateStore(
+            cache_config.get('month_aggregates_path', 'output/cache/month_aggregates.json')
+        )
+        self.archive_mirror = ArchiveMirror(cache_config.get('archive_mirror_path', 'output/cache/archive.sqlite'))
+        self.reconcile_seconds = cache_config.get('archive_reconcile_seconds', 900)
     
-    def _get_filtered_data(self, year=None, month=None):
+    def warm_up_models(self):
+        # Building an engine loads every model and pre-encodes the anchor terms
+        OCREngine(self.config)
+        return model_registry.get_stats()
+    
+    def get_model_stats(self):
+        return model_registry.get_stats()
+    
+    def get_embedding_cache_stats(self):
+        return model_registry.get_embedding_cache_stats()
+    
+    def reconcile_archive(self):
+        """Pull the full Archive sheet into the local mirror and rebuild the month aggregates"""
         df = self.processor.read_sheet_data(self.spreadsheet_title, self.archive_sheet)
+        if df is None:
+            return
         
-        if df is None or df.empty:
-            return pd.DataFrame()
+        self._store_reconciled(df)
+    
+    def _store_reconciled(self, df):
+        self.archive_mirror.replace(df)
+        self.month_aggregates.replace_all(build_month_aggregates(df))
+    
+    def _store_reconciled_and_invalidate(self, df):
+        self._store_reconciled(df)
+        # Snapshots for the records/export endpoints are older than the mirror now
+        self.archive_cache.invalidate()
+    
+    async def _reconcile_archive_async(self):
+        df = await self.sheets_api.read_sheet_data(self.spreadsheet_title, self.archive_sheet)
+        if df is None:
+            return
+        
+        # SQLite and aggregate rebuilds are blocking, so they run in a worker thread
+        await asyncio.to_thread(self._store_reconciled_and_invalidate, df)
+    
+    async def reconcile_archive_async(self):
+        """reconcile_archive over the async Sheets client; concurrent callers share one sync"""
+        await self._reconcile_flight.run('archive', self._reconcile_archive_async)
+    
+    def _load_archive(self):
+        """Load the typed Archive from the local mirror, reconciling with the sheet when due"""
+        if self.archive_mirror.needs_reconcile(self.reconcile_seconds):
+            try:
+                self.reconcile_archive()
+            except Exception as e:
+                # Keep serving the last mirrored copy if the Sheets API is unavailable
+                print(f"Error reconciling archive mirror: {e}")
+        
+        return self._read_archive_snapshot()
+    
+    def _read_archive_snapshot(self):
+        df = self.archive_mirror.read()
+        
+        if df.empty:
+            return ArchiveSnapshot(pd.DataFrame())
         
         if 'Image_name' in df.columns:
             df['Image_name'] = df['Image_name'].apply(
                 lambda x: os.path.abspath(os.path.join(self.backend_dir, '../output', x)) if pd.notna(x) else x
             )
         
-        if 'Month Year' in df.columns and (year or month):
-            if year and month:
-                # Match both short and full month names: 2025-Oct or 2025-October
-                pattern = f"{year}-{month}"
-                df = df[df['Month Year'].astype(str).str.contains(pattern, case=False, na=False)]
-            elif year:
-                df = df[df['Month Year'].astype(str).str.contains(year, case=False, na=False)]
+        return ArchiveSnapshot(df)
+    
+    def get_archive_cache_stats(self):
+        return self.archive_cache.get_stats()
+    
+    def get_sheets_api_stats(self):
+        return self.sheets_api.get_stats()
+    
+    def _update_month_aggregates(self, pushed_df):
+        """Recompute aggregates for the pushed months from the local mirror"""
+        pushed_months = pushed_df['Month Year'].dropna().astype(str).unique().tolist()
+        if not pushed_months:
+            return
         
-        return df
+        placeholders = ', '.join('?' for _ in pushed_months)
+        month_rows = self.archive_mirror.read(
+            f'SELECT * FROM archive WHERE "Month Year" IN ({placeholders})', pushed_months
+        )
+        self.month_aggregates.update_months(build_month_aggregates(month_rows))
     
-    def get_dashboard_metrics(self, year=None, month=None):
-        df = self._get_filtered_data(year, month)
+    async def _reconcile_if_due(self):
+        """Reconcile the mirror with the sheet when its reconciled_at stamp is older than reconcile_seconds"""
+        if time.time() < self._reconcile_due_at:
+            return
         
-        if df.empty:
-            return {
-                'total_receipts': 0,
-                'total_approvals': 0,
-                'pending_approvals': 0,
-                'rejected_receipts': 0
-            }
+        reconciled_at = await asyncio.to_thread(self.archive_mirror.reconciled_at)
+        if reconciled_at is None or time.time() - reconciled_at > self.reconcile_seconds:
+            try:
+                await self.reconcile_archive_async()
+                reconciled_at = time.time()
+            except Exception as e:
+                # Keep serving the last mirrored copy if the Sheets API is unavailable; retry in a minute
+                print(f"Error reconciling archive mirror: {e}")
+                self._reconcile_due_at = time.time() + min(60, self.reconcile_seconds)
+                return
+        self._reconcile_due_at = reconciled_at + self.reconcile_seconds
+    
+    async def _get_month_aggregate(self, year=None, month=None):
+        # Aggregates are kept current by reconciles and month jobs (the store reloads its
+        # file when another worker rewrites it), so the dashboard never needs the Archive
+        # snapshot; SQLite and file reads run in worker threads to keep the event loop free
+        await self._reconcile_if_due()
+        return await asyncio.to_thread(self.month_aggregates.lookup, year, month)
+    
+    def _get_filtered_data(self, year=None, month=None):
+        # Exact month/year partition lookup; callers add and overwrite columns,
+        # so never hand out the shared snapshot itself
+        return self.archive_cache.get().select(year, month).copy()
+    
+    @staticmethod
+    def _metrics_from_aggregate(aggregate):
+        return {
+            'total_receipts': aggregate['total_receipts'],
+            'total_approvals': aggregate['total_approvals'],
+            'pending_approvals': aggregate['pending_approvals'],
+            'rejected_receipts': aggregate['rejected_receipts']
+        }
+    
+    @staticmethod
+    def _employees_from_aggregate(aggregate):
+        employees = aggregate['employees']
         
-        total_receipts = len(df)
-        approved = len(df[df['Eligible for Reimbursement'] == 'Yes'])
-        rejected = len(df[df['Eligible for Reimbursement'] == 'No'])
-        pending = len(df[df['Category'].astype(str) == '3'])
+        return {
+            'total_employees': len(employees),
+            'employees': employees
+        }
+    
+    async def get_dashboard_metrics(self, year=None, month=None):
+        return self._metrics_from_aggregate(await self._get_month_aggregate(year, month))
+    
+    async def get_monthly_summary(self, year=None, month=None):
+        return (await self._get_month_aggregate(year, month))['daily']
+    
+    async def get_employee_reimbursements(self, year=None, month=None):
+        return self._employees_from_aggregate(await self._get_month_aggregate(year, month))
+    
+    async def get_dashboard(self, year=None, month=None):
+        # One aggregate lookup for the whole dashboard, in the shapes of the three separate endpoints
+        aggregate = await self._get_month_aggregate(year, month)
         
         return {
-            'total_receipts': total_receipts,
-            'total_approvals': approved,
-            'pending_approvals': pending,
-            'rejected_receipts': rejected
+            'metrics': self._metrics_from_aggregate(aggregate),
+            'summary': aggregate['daily'],
+            'employees': self._employees_from_aggregate(aggregate)
         }
     
-    def get_monthly_summary(self, year=None, month=None):
-        df = self._get_filtered_data(year, month)
+    def get_debug_data(self):
+        df = self.archive_cache.get().frame
         
         if df.empty:
-            return []
-        
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df = df.dropna(subset=['Date'])
-        df['Reimbursement Amount'] = pd.to_numeric(df['Reimbursement Amount'], errors='coerce').fillna(0)
-        
-        summary = df.groupby('Date').agg({
-            'Reimbursement Amount': 'sum',
-            'UserID': 'count'
-        }).reset_index()
-        
-        summary.columns = ['date', 'total_amount', 'receipt_count']
-        summary['date'] = summary['date'].dt.strftime('%Y-%m-%d')
+            return None
         
-        return summary.to_dict('records')
+        return {
+            "total_rows": len(df),
+            "columns": df.columns.tolist(),
+            "sample_month_year": df['Month Year'].dropna().unique().tolist() if 'Month Year' in df.columns else [],
+            "first_5_rows": self._to_records(df.head()),
+            "reconciled_at": self.archive_mirror.reconciled_at()
+        }
     
-    def get_employee_reimbursements(self, year=None, month=None):
-        df = self._get_filtered_data(year, month)
+    def get_records_page(self, year=None, month=None, offset=0, limit=None, fields=None, sort=None,
+                         emp_id=None, category=None, eligible=None):
+        """Filtered, sorted and projected page of Archive rows (all of them when limit is None); returns (total rows, records JSON)"""
+        # Read-only until the page is sliced, so the shared snapshot partition is not copied
+        df = self.archive_cache.get().select(year, month)
+        
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else []
+        sort_keys = [key.strip() for key in sort.split(',') if key.strip()] if sort else []
+        unknown = [name for name in fields + [key.lstrip('-') for key in sort_keys] if name not in df.columns]
+        if unknown and not df.empty:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
         
         if df.empty:
-            return {'total_employees': 0, 'employees': []}
+            return 0, '[]'
         
-        df['Reimbursement Amount'] = pd.to_numeric(df['Reimbursement Amount'], errors='coerce').fillna(0)
+        mask = None
+        for column, value in (('Emp ID', emp_id), ('Category', category), ('Eligible for Reimbursement', eligible)):
+            if value is None or column not in df.columns:
+                continue
+            column_mask = df[column].astype(str).str.strip().str.lower() == str(value).strip().lower()
+            mask = column_mask if mask is None else mask & column_mask
+        if mask is not None:
+            df = df[mask]
         
-        employee_summary = df.groupby(['Emp ID', 'Emp Name']).agg({
-            'Reimbursement Amount': 'sum'
-        }).reset_index()
+        if sort_keys:
+            # '-Column' sorts descending; mergesort keeps the sheet order for ties
+            df = df.sort_values(
+                [key.lstrip('-') for key in sort_keys],
+                ascending=[not key.startswith('-') for key in sort_keys],
+                kind='mergesort',
+                na_position='last'
+            )
         
-        employee_summary.columns = ['emp_id', 'name', 'total_reimbursement']
+        total = len(df)
+        page = df.iloc[offset:] if limit is None else df.iloc[offset:offset + limit]
+        if fields:
+            page = page[fields]
         
-        return {
-            'total_employees': len(employee_summary),
-            'employees': employee_summary.to_dict('records')
-        }
+        page = page.copy()
+        for column in page.select_dtypes(include='datetime').columns:
+            page[column] = page[column].dt.strftime('%Y-%m-%d')
+        # pandas' own JSON writer avoids building a list of per-row dicts
+        return total, page.to_json(orient='records', force_ascii=False)
     
-    def get_all_records(self, year=None, month=None):
-        df = self._get_filtered_data(year, month)
-        
-        if df.empty:
-            return []
-        
-        return df.to_dict('records')
+    def _to_records(self, df):
+        """Convert typed frame to JSON-safe records with dates as YYYY-MM-DD"""
+        df = df.copy()
+        for column in df.select_dtypes(include='datetime').columns:
+            df[column] = df[column].dt.strftime('%Y-%m-%d')
+        return df.astype(object).where(df.notna(), None).to_dict('records')
     
     def download_images(self, filter_type, filter_value, year=None, month=None):
         df = self._get_filtered_data(year, month)
@@ -121,124 +272,153 @@ class HRService:
         if filter_type == 'employee':
             df = df[df['Emp ID'] == filter_value]
         
-        image_paths = df['Image_name'].tolist()
+        image_paths = df['Image_name'].dropna().tolist()
         
-        temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-        with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for img_path in image_paths:
-                if os.path.exists(img_path):
-                    zip_file.write(img_path, os.path.basename(img_path))
-        
-        return temp_zip.name
+        # Entries are streamed as they are read, so nothing is staged on disk or held in memory
+        return stream_zip(image_paths)
     
-    def export_csv_report(self, year=None, month=None):
-        df = self._get_filtered_data(year, month)
+    def export_report(self, year=None, month=None, export_format='csv'):
+        # Reject a bad format even when the period has no data
+        check_export_format(export_format)
+        
+        # Read-only, so the shared snapshot partition is streamed without copying it
+        df = self.archive_cache.get().select(year, month)
         
         if df.empty:
             return None
         
-        # Create CSV filename similar to archive format
-        filename = f"{year}_{month}_reimbursement_report.csv" if year and month else "reimbursement_report.csv"
-        csv_path = os.path.join(self.backend_dir, '../output', 'csv', filename)
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        # Save with same columns as archive
-        df.to_csv(csv_path, index=False)
-        
-        return csv_path
+        return stream_export(df, export_format)
 
-    def process_month_data_with_progress(self, month_year, job_id, progress_store):
+    def process_month_data_with_progress(self, month_year, job_id, job_store):
         try:
+            progress_interval = self.config.get('jobs', {}).get('progress_interval_seconds', 0.25)
+            
+            def check_cancelled():
+                if job_store.is_cancel_requested(job_id):
+                    raise JobCancelled(f"Job {job_id} was cancelled")
+            
             def update_progress(progress, status):
-                progress_store[job_id].update({
+                check_cancelled()
+                job_store.update(job_id, {
                     'progress': progress,
                     'status': status
                 })
             
+            stage_timer = StageTimer()
             update_progress(5, 'Initializing components...')
             
             # Initialize components
-            downloader = GDriveDownloader(self.config)
+            downloader = GDriveDownloader(self.config, drive=self.drive)
             ocr_engine = OCREngine(self.config)
             
             # Setup paths
             download_folder = self.config['paths']['download_base']
             csv_output_path = os.path.join(self.config['paths']['output_csv'], f"{month_year}.csv")
             
+            stage_timer.mark('initialize')
             update_progress(15, 'Downloading from Google Drive...')
             
-            # Step 1: Download from Google Drive
-            employee_names = downloader.download_employee_data(
-                self.config['gdrive']['root_folder_name'],
-                download_folder,
-                month_year
-            )
+            # Download, decode, OCR and CSV append run as overlapping stages;
+            # progress is driven by how many receipts have reached the CSV
+            if os.path.exists(csv_output_path):
+                os.remove(csv_output_path)
             
-            update_progress(25, 'Scanning employee folders...')
+            stage_stats = {'download': {}, 'pipeline': {}}
+            last_report = {'progress': 0.0, 'cancel_check': 0.0}
+            report_lock = threading.Lock()
             
-            # Step 2: Get image files from specific employee month folders
-            image_files = []
-            for employee_name in employee_names:
-                employee_month_folder = os.path.join(download_folder, employee_name, month_year)
-                if os.path.exists(employee_month_folder):
-                    employee_files = list_files_recursive(employee_month_folder, self.config['ocr']['supported_formats'])
-                    image_files.extend(employee_files)
+            def report_stage_progress():
+                # Stage callbacks fire per file from several threads; persist at most every progress_interval
+                with report_lock:
+                    now = time.monotonic()
+                    if now - last_report['progress'] < progress_interval:
+                        return
+                    last_report['progress'] = now
+                
+                download = stage_stats['download']
+                pipeline_stats = stage_stats['pipeline']
+                # Receipts the pipeline accepted (cache hits included; non-images and failed
+                # downloads never reach it), plus an estimate for downloads still pending
+                # that assumes they contain images in the same share as those submitted so far
+                queued = pipeline_stats.get('queued', 0)
+                submitted = download.get('files_done', 0) + download.get('files_skipped', 0)
+                pending_downloads = max(
+                    download.get('files_total', 0) - download.get('files_done', 0) - download.get('files_failed', 0), 0
+                )
+                image_share = queued / submitted if submitted else 1.0
+                expected = queued + int(round(pending_downloads * image_share))
+                finished = pipeline_stats.get('written', 0) + pipeline_stats.get('failed', 0)
+                progress = 15 + int(70 * finished / expected) if expected else 15
+                
+                # ETA from the receipt throughput so far; None until the first receipt lands
+                elapsed = time.monotonic() - stages_started
+                eta_seconds = None
+                if expected and finished:
+                    eta_seconds = round(max(expected - finished, 0) * elapsed / finished, 1)
+                
+                job_store.update(job_id, {
+                    'progress': min(progress, 85),
+                    'status': (
+                        f"Downloaded {download.get('files_done', 0)}/{download.get('files_total', 0)} files, "
+                        f"OCR'd {pipeline_stats.get('ocr_done', 0)}, cached {pipeline_stats.get('cached', 0)}"
+                    ),
+                    'download': dict(download),
+                    'pipeline': dict(pipeline_stats),
+                    'stages': {
+                        'downloaded': download.get('files_done', 0),
+                        'skipped': download.get('files_skipped', 0),
+                        'to_download': download.get('files_total', 0),
+                        'download_failed': download.get('files_failed', 0),
+                        'decoded': pipeline_stats.get('decoded', 0),
+                        'ocr_done': pipeline_stats.get('ocr_done', 0),
+                        'cached': pipeline_stats.get('cached', 0),
+                        'written': pipeline_stats.get('written', 0),
+                        'failed': pipeline_stats.get('failed', 0)
+                    },
+                    'elapsed_seconds': round(elapsed, 1),
+                    'eta_seconds': eta_seconds
+                })
             
-            if not image_files:
-                return {"message": "No images found for processing", "processed_count": 0}
+            def check_cancelled_periodically():
+                # Only called from the producer thread, so raising here stops the stream cleanly
+                now = time.monotonic()
+                if now - last_report['cancel_check'] >= progress_interval:
+                    last_report['cancel_check'] = now
+                    check_cancelled()
             
-            # Step 3: Process with OCR with progress updates
-            if os.path.exists(csv_output_path):
-                os.remove(csv_output_path)
+            def update_download_progress(stats):
+                stage_stats['download'] = stats
+                report_stage_progress()
+                check_cancelled_periodically()
             
-            def create_batches(items, batch_size):
-                for i in range(0, len(items), batch_size):
-                    yield items[i:i + batch_size]
-
-            from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
-            from threading import Lock
-            import gc
-            import threading
+            def update_pipeline_progress(stats):
+                stage_stats['pipeline'] = stats
+                report_stage_progress()
             
-            processed_count = 0
-            BATCH_SIZE = 20 
-            csv_lock = Lock()
-
-            def process_single_image(image_path):
-                try:
-                    result = ocr_engine.process_image(image_path)
-                    if result:
-                        with csv_lock:
-                            ocr_engine.save_to_csv(result, csv_output_path)
-                        return image_path
-                    return None
-                except Exception as e:
-                    return None
+            pipeline = StreamingOCRPipeline(ocr_engine, csv_output_path, self.config, update_pipeline_progress)
             
-            batches = list(create_batches(image_files, BATCH_SIZE))
-            total_batches = len(batches)
+            def download_receipts(submit):
+                def submit_receipt(file_path):
+                    check_cancelled_periodically()
+                    submit(file_path)
+                
+                return downloader.download_employee_data(
+                    self.config['gdrive']['root_folder_name'],
+                    download_folder,
+                    month_year,
+                    progress_callback=update_download_progress,
+                    file_callback=submit_receipt
+                )
             
-            for batch_idx, batch in enumerate(batches, start=1):
-                progress = 35 + (batch_idx - 1) * 10  # 35% to 85%
-                update_progress(progress, f'Processing OCR batch {batch_idx}/{total_batches}...')
-
-                with ThreadPoolExecutor(max_workers=4) as executor:
-                    futures = {
-                       executor.submit(process_single_image, image): image
-                        for image in batch
-                    }
-
-                    for future in as_completed(futures):
-                        try:
-                            result = future.result(timeout=30)
-                            if result:
-                                processed_count += 1
-                        except:
-                            pass
-
-                    gc.collect()
+            stages_started = time.monotonic()
+            pipeline.run(download_receipts)
+            stage_timer.mark('download_ocr')
+            
+            if not pipeline.stats['queued']:
+                return {"message": "No images found for processing", "processed_count": 0}
+            
+            processed_count = pipeline.stats['written']
+            pipeline_seconds = pipeline.stats['elapsed_seconds']
             
             update_progress(90, 'Post-processing data...')
             
@@ -254,6 +434,7 @@ class HRService:
             df = self.processor.extract_day(df)
             df = self.processor.extract_month_year(df)
             
+            stage_timer.mark('post_process')
             update_progress(95, 'Matching employee data...')
             
             # Step 5: Employee matching
@@ -262,22 +443,37 @@ class HRService:
             )
             final_df = self.processor.process_employee_matching(df, emp_data_df, month_year)
             
+            stage_timer.mark('employee_matching')
             update_progress(98, 'Pushing to archive sheet...')
             
-            # Step 6: Push to archive
-            self.processor.push_to_sheet(final_df, self.spreadsheet_title, self.archive_sheet, append=True)
+            # Step 6: Upsert into archive on (Date, UserID) instead of read-all/clear/rewrite
+            upsert_stats = self.processor.upsert_to_sheet(
+                final_df, self.spreadsheet_title, self.archive_sheet, key_columns=['Date', 'UserID']
+            )
+            self.archive_mirror.upsert(final_df, key_columns=['Date', 'UserID'])
+            self._update_month_aggregates(final_df)
             
-            # Remove duplicates
-            archive_data = self.processor.read_sheet_data(self.spreadsheet_title, self.archive_sheet)
-            if archive_data is not None:
-                archive_no_dup = self.processor.remove_duplicates(archive_data, ['Date', 'UserID'])
-                self.processor.push_to_sheet(archive_no_dup, self.spreadsheet_title, self.archive_sheet, append=False)
+            # Dashboard snapshots in every worker are now out of date
+            self.archive_cache.invalidate()
+            stage_timer.mark('archive_push')
             
             return {
                 "message": "Processing completed successfully",
                 "processed_count": processed_count,
-                "month_year": month_year
+                "month_year": month_year,
+                "pipeline_seconds": pipeline_seconds,
+                "stage_seconds": stage_timer.seconds,
+                "images_per_second": round(pipeline.stats['queued'] / pipeline_seconds, 2) if pipeline_seconds else 0,
+                "pipeline": pipeline.stats,
+                "ocr_cache": ocr_engine.get_cache_stats(),
+                "image_decode": ocr_engine.get_decode_stats(),
+                "drive_sync": downloader.last_sync_stats,
+                "archive_upsert": upsert_stats,
+                "model_stats": model_registry.get_stats(),
+                "embedding_cache": model_registry.get_embedding_cache_stats()
             }
             
+        except JobCancelled:
+            raise
         except Exception as e:
             return {"message": f"Error during processing: {str(e)}", "processed_count": 0}
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getMetrics, getSummary, getEmployees, downloadImages, processMonth, exportCSV } from '../services/api';
+import { getDashboard, downloadImages, processMonth, exportCSV } from '../services/api';
 import MetricsCard from './MetricsCard';
 import EmployeeTable from './EmployeeTable';
 import SummaryChart from './SummaryChart';
@@ -23,18 +23,14 @@ const Dashboard = () => {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [metricsRes, summaryRes, employeesRes] = await Promise.all([
-        getMetrics(year, month),
-        getSummary(year, month),
-        getEmployees(year, month)
-      ]);
-      setMetrics(metricsRes.data);
-      setSummary(summaryRes.data);
-      setEmployees(employeesRes.data.employees);
+      const dashboardRes = await getDashboard(year, month);
+      setMetrics(dashboardRes.data.metrics);
+      setSummary(dashboardRes.data.summary);
+      setEmployees(dashboardRes.data.employees.employees);
       
       // Debug logging
-      console.log('Summary data:', summaryRes.data);
-      console.log('Summary length:', summaryRes.data.length);
+      console.log('Summary data:', dashboardRes.data.summary);
+      console.log('Summary length:', dashboardRes.data.summary.length);
     } catch (error) {
       console.error('Error fetching data:', error);
     }
@@ -63,9 +59,10 @@ const Dashboard = () => {
     
     try {
       const monthYear = `${getMonthName(month)} ${year}`;
-      await processMonth(monthYear, (progressValue, status) => {
+      await processMonth(monthYear, (progressValue, status, job) => {
         setProgress(progressValue);
-        setProgressStatus(status);
+        const eta = job && job.eta_seconds != null ? ` (about ${Math.ceil(job.eta_seconds)}s left)` : '';
+        setProgressStatus(`${status}${eta}`);
       });
       
       setTimeout(() => {
@@ -3,6 +3,10 @@ import axios from 'axios';
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
 const API_URL = `${API_BASE_URL}/api`;
 
+// Metrics, daily summary and employee totals in one round trip
+export const getDashboard = (year, month) => 
+  axios.get(`${API_URL}/dashboard`, { params: { year, month } });
+
 export const getMetrics = (year, month) => 
   axios.get(`${API_URL}/dashboard/metrics`, { params: { year, month } });
 
@@ -12,8 +16,11 @@ export const getSummary = (year, month) =>
 export const getEmployees = (year, month) => 
   axios.get(`${API_URL}/dashboard/employees`, { params: { year, month } });
 
-export const getRecords = (year, month) => 
-  axios.get(`${API_URL}/records`, { params: { year, month } });
+// options: { offset, limit, fields, sort, emp_id, category, eligible }; fields/sort are comma-separated,
+// '-Column' sorts descending. With offset or limit it responds with { total, offset, limit, next_offset, records },
+// otherwise with the plain array of all matching records.
+export const getRecords = (year, month, options = {}) => 
+  axios.get(`${API_URL}/records`, { params: { year, month, ...options } });
 
 export const downloadImages = (type, value, year, month) => 
   axios.get(`${API_URL}/download/images`, { 
@@ -21,6 +28,71 @@ export const downloadImages = (type, value, year, month) =>
     responseType: 'blob'
   });
 
+const pollProgress = (jobId, onProgress, resolve, reject) => {
+  const pollInterval = setInterval(() => {
+    axios.get(`${API_URL}/process/progress/${jobId}`)
+      .then(progressResponse => {
+        const { progress, status, completed, error } = progressResponse.data;
+        
+        if (onProgress) {
+          onProgress(progress, status, progressResponse.data);
+        }
+        
+        if (completed) {
+          clearInterval(pollInterval);
+          if (error) {
+            reject(new Error(error));
+          } else {
+            resolve(progressResponse.data);
+          }
+        }
+      })
+      .catch(pollError => {
+        clearInterval(pollInterval);
+        reject(pollError);
+      });
+  }, 2000); // Poll every 2 seconds
+};
+
+const streamProgress = (jobId, onProgress, resolve, reject) => {
+  const source = new EventSource(`${API_URL}/process/events/${jobId}`);
+  let finished = false;
+  
+  const handleEvent = (event) => {
+    const job = JSON.parse(event.data);
+    
+    if (onProgress) {
+      onProgress(job.progress, job.status, job);
+    }
+    
+    if (job.completed) {
+      finished = true;
+      source.close();
+      if (job.error) {
+        reject(new Error(job.error));
+      } else {
+        resolve(job);
+      }
+    }
+  };
+  
+  source.addEventListener('progress', handleEvent);
+  source.addEventListener('done', handleEvent);
+  source.addEventListener('missing', (event) => {
+    finished = true;
+    source.close();
+    reject(new Error(JSON.parse(event.data).error));
+  });
+  source.onerror = () => {
+    // The stream dropped (proxy, network or worker restart): keep tracking the job by polling
+    source.close();
+    if (!finished) {
+      finished = true;
+      pollProgress(jobId, onProgress, resolve, reject);
+    }
+  };
+};
+
 export const processMonth = (monthYear, onProgress) => {
   return new Promise((resolve, reject) => {
     // Start the backend process
@@ -28,37 +100,20 @@ export const processMonth = (monthYear, onProgress) => {
       .then(response => {
         const jobId = response.data.job_id;
         
-        // Poll for progress
-        const pollInterval = setInterval(() => {
-          axios.get(`${API_URL}/process/progress/${jobId}`)
-            .then(progressResponse => {
-              const { progress, status, completed, error } = progressResponse.data;
-              
-              if (onProgress) {
-                onProgress(progress, status);
-              }
-              
-              if (completed) {
-                clearInterval(pollInterval);
-                if (error) {
-                  reject(new Error(error));
-                } else {
-                  resolve(progressResponse.data);
-                }
-              }
-            })
-            .catch(pollError => {
-              clearInterval(pollInterval);
-              reject(pollError);
-            });
-        }, 2000); // Poll every 2 seconds
+        // Progress is pushed over Server-Sent Events where available
+        if (typeof EventSource !== 'undefined') {
+          streamProgress(jobId, onProgress, resolve, reject);
+        } else {
+          pollProgress(jobId, onProgress, resolve, reject);
+        }
       })
       .catch(reject);
   });
 };
 
-export const exportCSV = (year, month) => 
+// format: 'csv' (default), 'csv.gz' or 'parquet'
+export const exportCSV = (year, month, format = 'csv') => 
   axios.post(`${API_URL}/export/csv`, null, { 
-    params: { year, month },
+    params: { year, month, format },
     responseType: 'blob'
   });
\ No newline at end of file